@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import argparse
+import subprocess
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--env-name",
+    dest="env_name",
+    help="gym environment to create after importing",
+    default='MiniGrid-Empty-8x8-v0'
+)
+parser.add_argument("--num_runs", type=int, default=10)
+args = parser.parse_args()
+
+# Each statement is timed in a fresh interpreter, so that nothing is
+# already imported, as in a newly spawned worker process
+statements = [
+    ('python', 'pass'),
+    ('gym', 'import gym'),
+    ('gym_minigrid', 'import gym_minigrid'),
+    ('gym.make', 'import gym, gym_minigrid; gym.make({!r})'.format(args.env_name)),
+    ('SSP deps', 'import nengo_spa, nengo_ssp'),
+]
+
+for name, statement in statements:
+    times = []
+    for i in range(args.num_runs):
+        t0 = time.time()
+        subprocess.run(
+            [sys.executable, '-c', statement],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        t1 = time.time()
+        times.append(1000 * (t1 - t0))
+
+    print('{:<13}: {:.0f} ms'.format(name, min(times)))
@@ -1,4 +1,7 @@
-# Import the envs module so that envs register themselves
+# Register the environments, their modules are only imported when an
+# environment is made or one of their classes is accessed
+from gym_minigrid.register import register_envs
+register_envs()
 import gym_minigrid.envs
 
 # Import wrappers so it's accessible when installing with pip
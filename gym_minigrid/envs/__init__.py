@@ -1,24 +1,84 @@
-from gym_minigrid.envs.empty import *
-from gym_minigrid.envs.doorkey import *
-from gym_minigrid.envs.multiroom import *
-from gym_minigrid.envs.fetch import *
-from gym_minigrid.envs.gotoobject import *
-from gym_minigrid.envs.gotodoor import *
-from gym_minigrid.envs.putnear import *
-from gym_minigrid.envs.lockedroom import *
-from gym_minigrid.envs.keycorridor import *
-from gym_minigrid.envs.unlock import *
-from gym_minigrid.envs.unlockpickup import *
-from gym_minigrid.envs.blockedunlockpickup import *
-from gym_minigrid.envs.playground_v0 import *
-from gym_minigrid.envs.redbluedoors import *
-from gym_minigrid.envs.obstructedmaze import *
-from gym_minigrid.envs.memory import *
-from gym_minigrid.envs.fourrooms import *
-from gym_minigrid.envs.crossing import *
-from gym_minigrid.envs.lavagap import *
-from gym_minigrid.envs.dynamicobstacles import *
-from gym_minigrid.envs.distshift import *
-from gym_minigrid.envs.emptygoal import *
-from gym_minigrid.envs.fourcorridors import *
-from gym_minigrid.envs.emptynogoal import *
+import importlib
+import types
+from gym_minigrid.register import ENV_ENTRY_POINTS
+
+# The grid, objects, constants and base classes which the environment
+# modules re-export are cheap to import, and are available right away
+import gym_minigrid.minigrid
+from gym_minigrid.minigrid import *
+from gym_minigrid.roomgrid import RoomGrid
+
+# The environment modules are imported on first access to one of their
+# environment classes (e.g. `from gym_minigrid.envs import DoorKeyEnv`),
+# rather than when this package is imported
+ENV_MODULES = [
+    'empty',
+    'doorkey',
+    'multiroom',
+    'fetch',
+    'gotoobject',
+    'gotodoor',
+    'putnear',
+    'lockedroom',
+    'keycorridor',
+    'unlock',
+    'unlockpickup',
+    'blockedunlockpickup',
+    'playground_v0',
+    'redbluedoors',
+    'obstructedmaze',
+    'memory',
+    'fourrooms',
+    'crossing',
+    'lavagap',
+    'dynamicobstacles',
+    'distshift',
+    'emptygoal',
+    'fourcorridors',
+    'emptynogoal',
+]
+
+# Environment classes which are not registered themselves, such as the
+# base classes of registered environments, by module
+BASE_CLASSES = {
+    'MultiRoomEnv': 'multiroom',
+    'Room': 'lockedroom',
+    'KeyCorridor': 'keycorridor',
+    'ObstructedMazeEnv': 'obstructedmaze',
+    'MemoryEnv': 'memory',
+    'CrossingEnv': 'crossing',
+    'LavaGapEnv': 'lavagap',
+    'DistShiftEnv': 'distshift',
+    'FourCorridorsEnv': 'fourcorridors',
+}
+
+# Modules of the environment classes
+_class_modules = dict(
+    reversed(entry_point.split(':'))
+    for _, entry_point in ENV_ENTRY_POINTS
+)
+_class_modules.update(
+    (name, 'gym_minigrid.envs.' + module)
+    for name, module in BASE_CLASSES.items()
+)
+
+_base_names = [
+    name for name, value in vars(gym_minigrid.minigrid).items()
+    if not name.startswith('_') and not isinstance(value, types.ModuleType)
+]
+
+__all__ = sorted(set(_class_modules) | set(_base_names) | {'RoomGrid'})
+
+def __getattr__(name):
+    if name in _class_modules:
+        value = getattr(importlib.import_module(_class_modules[name]), name)
+    elif name in ENV_MODULES:
+        value = importlib.import_module('gym_minigrid.envs.' + name)
+    else:
+        raise AttributeError("module 'gym_minigrid.envs' has no attribute '{}'".format(name))
+
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_class_modules) | set(ENV_MODULES))
@@ -1,8 +1,6 @@
 from gym_minigrid.minigrid import *
-from gym_minigrid.register import register
 import numpy as np
 from gym import spaces
-from gym_minigrid.wrappers import SSPSpace
 
 class EmptyGoalEnv(MiniGridEnv):
     """
@@ -48,6 +46,7 @@ class EmptyGoalEnv(MiniGridEnv):
         #self.xy_list = np.vstack([xx.reshape(-1),yy.reshape(-1)]).T
         
         if self.use_ssp:
+            from gym_minigrid.wrappers import SSPSpace
             self.observation_space.spaces.update({'mission': SSPSpace(basis=[X,Y], radius=1)})
         else:
             self.observation_space.spaces.update({'mission': spaces.Box(low=0,high=self.size,shape=(2,),dtype='uint8')})
@@ -101,33 +100,3 @@ class EmptyRandomGoalEnv6x6(EmptyGoalEnv):
 class EmptyGoalEnv16x16(EmptyGoalEnv):
     def __init__(self, **kwargs):
         super().__init__(size=16, **kwargs)
-
-register(
-    id='MiniGrid-EmptyGoal-5x5-v0',
-    entry_point='gym_minigrid.envs:EmptyGoalEnv5x5'
-)
-
-register(
-    id='MiniGrid-EmptyGoal-Random-5x5-v0',
-    entry_point='gym_minigrid.envs:EmptyRandomGoalEnv5x5'
-)
-
-register(
-    id='MiniGrid-EmptyGoal-6x6-v0',
-    entry_point='gym_minigrid.envs:EmptyGoalEnv6x6'
-)
-
-register(
-    id='MiniGrid-EmptyGoal-Random-6x6-v0',
-    entry_point='gym_minigrid.envs:EmptyRandomGoalEnv6x6'
-)
-
-register(
-    id='MiniGrid-EmptyGoal-8x8-v0',
-    entry_point='gym_minigrid.envs:EmptyGoalEnv'
-)
-
-register(
-    id='MiniGrid-EmptyGoal-16x16-v0',
-    entry_point='gym_minigrid.envs:EmptyGoalEnv16x16'
-)
\ No newline at end of file
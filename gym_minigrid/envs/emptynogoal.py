@@ -1,5 +1,4 @@
 from gym_minigrid.minigrid import *
-from gym_minigrid.register import register
 
 class EmptyNoGoalEnv(MiniGridEnv):
     """
@@ -60,33 +59,3 @@ class EmptyNoGoalRandomEnv6x6(EmptyNoGoalEnv):
 class EmptyNoGoalEnv16x16(EmptyNoGoalEnv):
     def __init__(self, **kwargs):
         super().__init__(size=16, **kwargs)
-
-register(
-    id='MiniGrid-EmptyNoGoal-5x5-v0',
-    entry_point='gym_minigrid.envs:EmptyNoGoalEnv5x5'
-)
-
-register(
-    id='MiniGrid-EmptyNoGoal-Random-5x5-v0',
-    entry_point='gym_minigrid.envs:EmptyNoGoalRandomEnv5x5'
-)
-
-register(
-    id='MiniGrid-EmptyNoGoal-6x6-v0',
-    entry_point='gym_minigrid.envs:EmptyNoGoalEnv6x6'
-)
-
-register(
-    id='MiniGrid-EmptyNoGoal-Random-6x6-v0',
-    entry_point='gym_minigrid.envs:EmptyNoGoalRandomEnv6x6'
-)
-
-register(
-    id='MiniGrid-EmptyNoGoal-8x8-v0',
-    entry_point='gym_minigrid.envs:EmptyNoGoalEnv'
-)
-
-register(
-    id='MiniGrid-EmptyNoGoal-16x16-v0',
-    entry_point='gym_minigrid.envs:EmptyNoGoalEnv16x16'
-)
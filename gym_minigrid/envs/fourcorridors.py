@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 
 from gym_minigrid.minigrid import *
-from gym_minigrid.register import register
 
 
 class FourCorridorsEnv(MiniGridEnv):
@@ -79,29 +78,6 @@ class FourCorridorsEnv4(FourCorridorsEnv):
     def __init__(self, **kwargs):
         super().__init__(goal_corridor=4, **kwargs)
 
-register(
-    id='MiniGrid-FourCorridors1-v0',
-    entry_point='gym_minigrid.envs:FourCorridorsEnv1'
-)
-
-register(
-    id='MiniGrid-FourCorridors2-v0',
-    entry_point='gym_minigrid.envs:FourCorridorsEnv2'
-)
-
-
-register(
-    id='MiniGrid-FourCorridors3-v0',
-    entry_point='gym_minigrid.envs:FourCorridorsEnv3'
-)
-
-
-register(
-    id='MiniGrid-FourCorridors4-v0',
-    entry_point='gym_minigrid.envs:FourCorridorsEnv4'
-)
-
-
 
 # import gym
 # import gym_minigrid
@@ -110,4 +86,4 @@ register(
 # plt.imshow(env.render('human'))
 
 # state, reward, done,_ =env.step(2)
-# plt.imshow(env.render('human'))
\ No newline at end of file
+# plt.imshow(env.render('human'))
@@ -0,0 +1,144 @@
+import os
+import pickle
+import numpy as np
+import gym
+
+from .minigrid import Grid
+
+# Environment attributes which are not part of a generated level, or
+# which are stored separately from the other fields
+BASE_FIELDS = {
+    'actions', 'action_space', 'observation_space', 'reward_range', 'spec',
+    'window', 'width', 'height', 'max_steps', 'see_through_walls',
+    'agent_view_size', 'np_random', '_np_random', 'level_source',
+    'fast_rng', 'rejection_sampling', 'max_mission_tokens',
+    '_mission_tokens', '_tokenized_mission',
+    'grid', 'agent_pos', 'agent_dir', 'mission', 'carrying', 'step_count',
+}
+
+def level_fields(env):
+    """
+    Fields of an environment describing its current level besides the
+    grid, the agent pose and the mission, e.g. those set by `_gen_grid`
+    such as `goal_pos` or `room_grid`
+    """
+
+    return {name: value for name, value in vars(env).items() if name not in BASE_FIELDS}
+
+class LevelBank:
+    """
+    Bank of pregenerated levels of an environment, stored in a directory.
+
+    The grid encodings and agent poses are stored in .npy files which are
+    memory-mapped, so that many processes can share one bank. The mission,
+    the objects of the grid and the other fields of the level (see
+    `level_fields`) are pickled along, each level as a single object graph,
+    so that fields referencing objects of the grid (e.g. `obj` or the doors
+    of `room_grid`) still do once loaded.
+
+    Setting a bank as the `level_source` of an environment makes `reset`
+    load a level drawn at random from the bank instead of generating one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.grids = np.load(os.path.join(path, 'grids.npy'), mmap_mode='r')
+        self.agents = np.load(os.path.join(path, 'agents.npy'), mmap_mode='r')
+
+        with open(os.path.join(path, 'levels.pkl'), 'rb') as f:
+            meta = pickle.load(f)
+        self.env_id = meta['env_id']
+        self.levels = meta['levels']
+
+        assert len(self.grids) == len(self.agents) == len(self.levels)
+
+    def __len__(self):
+        return len(self.levels)
+
+    @staticmethod
+    def generate(env, path, num_levels, seed=0):
+        """
+        Generate levels of an environment and save them into a bank
+
+        :param env: environment, or id of a registered environment
+        :param path: directory where to save the bank
+        :param num_levels: number of levels to generate
+        :param seed: seed of the first level, the following levels use the
+            next seeds
+        """
+
+        if isinstance(env, str):
+            env = gym.make(env)
+        env = env.unwrapped
+        env_id = env.spec.id if env.spec is not None else type(env).__name__
+
+        grids = np.zeros((num_levels, env.width, env.height, 3), dtype='uint8')
+        agents = np.zeros((num_levels, 3), dtype=np.int64)
+        levels = []
+
+        for index in range(num_levels):
+            env.seed(seed + index)
+            env.reset()
+
+            grid = env.grid
+            assert (grid.width, grid.height) == (env.width, env.height)
+            grids[index] = grid.array
+            agents[index] = (*env.agent_pos, env.agent_dir)
+
+            # Pickled at once so that the fields and the grid share objects
+            levels.append(pickle.dumps({
+                'mission': env.mission,
+                'objs': grid.objs,
+                'fields': level_fields(env),
+            }))
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'grids.npy'), grids)
+        np.save(os.path.join(path, 'agents.npy'), agents)
+        with open(os.path.join(path, 'levels.pkl'), 'wb') as f:
+            pickle.dump({'env_id': env_id, 'levels': levels}, f)
+
+        return LevelBank(path)
+
+    def load(self, env, index):
+        """
+        Load a level of the bank into an environment
+        """
+
+        level = pickle.loads(self.levels[index])
+
+        grid = Grid._from_arrays(np.array(self.grids[index]), level['objs'])
+        assert (grid.width, grid.height) == (env.width, env.height)
+        for (i, j), obj in np.ndenumerate(grid.objs):
+            if obj is not None:
+                obj._grid_cell = (grid, i, j)
+
+        x, y, agent_dir = self.agents[index].tolist()
+        env.grid = grid
+        env.agent_pos = np.array((x, y))
+        env.agent_dir = agent_dir
+        env.mission = level['mission']
+
+        for name, value in level['fields'].items():
+            setattr(env, name, value)
+
+    def load_level(self, env):
+        """
+        Load a level drawn at random with the environment's RNG
+        """
+
+        self.load(env, env._rand_int(0, len(self)))
+
+class LevelBankWrapper(gym.core.Wrapper):
+    """
+    Wrapper making the environment reset to levels drawn from a level bank
+    instead of generating new levels
+    """
+
+    def __init__(self, env, bank):
+        super().__init__(env)
+
+        if not isinstance(bank, LevelBank):
+            bank = LevelBank(bank)
+        self.bank = bank
+        self.unwrapped.level_source = bank
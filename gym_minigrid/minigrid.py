@@ -1,11 +1,16 @@
+import re
 import math
 import hashlib
 import gym
+from collections import OrderedDict
 from enum import IntEnum
 import numpy as np
 from gym import error, spaces, utils
 from gym.utils import seeding
 from .rendering import *
+from .visibility import compute_vis_mask
+from .rng import BatchedRandom
+from . import zobrist
 
 # Size in pixels of a tile in the full-scale human view
 TILE_PIXELS = 32
@@ -72,6 +77,43 @@ DIR_TO_VEC = [
     np.array((0, -1)),
 ]
 
+# Words of the mission templates of the included environments, besides
+# color names and object types
+MISSION_TEMPLATE_WORDS = [
+    'a', 'and', 'at', 'avoid', 'end', 'explore', 'fetch', 'find', 'from',
+    'get', 'go', 'hallway', 'matching', 'must', 'near', 'object', 'of',
+    'open', 'opening', 'pick', 'put', 'reach', 'room', 'rooms', 'square',
+    'the', 'then', 'to', 'traverse', 'unlock', 'up', 'use', 'you',
+]
+
+# Vocabulary of mission tokens. Index 0 pads token arrays, and words which
+# are not in the vocabulary map to index 1.
+MISSION_VOCAB = ['<pad>', '<unk>'] + COLOR_NAMES + list(OBJECT_TO_IDX.keys()) + [
+    word for word in MISSION_TEMPLATE_WORDS
+    if word not in COLOR_NAMES and word not in OBJECT_TO_IDX
+]
+MISSION_TOKEN_TO_IDX = {word: idx for idx, word in enumerate(MISSION_VOCAB)}
+
+# Default length of mission token arrays
+MAX_MISSION_TOKENS = 32
+
+def tokenize_mission(mission, max_tokens=MAX_MISSION_TOKENS):
+    """
+    Convert a mission string into a (max_tokens,) uint16 array of the
+    indices of its words in MISSION_VOCAB, padded with zeros
+    """
+
+    if not isinstance(mission, str):
+        raise TypeError('only string missions can be tokenized, not {}'.format(type(mission).__name__))
+
+    words = re.findall('[a-z]+', mission.lower())
+    assert len(words) <= max_tokens, 'mission too long ({} words)'.format(len(words))
+
+    tokens = np.zeros(max_tokens, dtype=np.uint16)
+    tokens[:len(words)] = [MISSION_TOKEN_TO_IDX.get(word, 1) for word in words]
+
+    return tokens
+
 class WorldObj:
     """
     Base class for grid world objects
@@ -90,6 +132,25 @@ class WorldObj:
         # Current position of the object
         self.cur_pos = None
 
+        # Grid and cell this object was last set into, used to keep
+        # the grid encoding in sync when the object changes state
+        self._grid_cell = None
+
+    def __getstate__(self):
+        # The grid cell is not pickled along with the object, grids
+        # register their objects again when unpickled
+        state = self.__dict__.copy()
+        state['_grid_cell'] = None
+        return state
+
+    def _refresh_encoding(self):
+        """Re-encode this object into the grid cell it occupies, if any"""
+        if self._grid_cell is None:
+            return
+        grid, i, j = self._grid_cell
+        if grid.objs[i, j] is self:
+            grid._write_cell(i, j, self.encode())
+
     def can_overlap(self):
         """Can the agent overlap with this?"""
         return False
@@ -215,8 +276,26 @@ class Wall(WorldObj):
 class Door(WorldObj):
     def __init__(self, color, is_open=False, is_locked=False):
         super().__init__('door', color)
-        self.is_open = is_open
-        self.is_locked = is_locked
+        self._is_open = is_open
+        self._is_locked = is_locked
+
+    @property
+    def is_open(self):
+        return self._is_open
+
+    @is_open.setter
+    def is_open(self, value):
+        self._is_open = value
+        self._refresh_encoding()
+
+    @property
+    def is_locked(self):
+        return self._is_locked
+
+    @is_locked.setter
+    def is_locked(self, value):
+        self._is_locked = value
+        self._refresh_encoding()
 
     def can_overlap(self):
         """The agent can only walk over this cell when the door is open"""
@@ -328,13 +407,179 @@ class Box(WorldObj):
         env.grid.set(*pos, self.contains)
         return True
 
+class TileCache:
+    """
+    Cache of rendered tiles, shared by all grids.
+
+    The tiles of a given tile size are kept in an atlas, a (num_tiles,
+    tile_size, tile_size, 3) array holding every possible tile appearance
+    at the position given by `index`. Tiles are rendered on first use or
+    ahead of time with `prewarm`. At most `capacity` atlases are kept,
+    the least recently used one being evicted first, and atlases can be
+    saved to disk so that new processes do not have to render them again.
+    """
+
+    # Number of tiles in an atlas, see index
+    num_tiles = len(OBJECT_TO_IDX) * len(COLOR_TO_IDX) * len(STATE_TO_IDX) * 5 * 2
+
+    def __init__(self, capacity=8):
+        assert capacity >= 1
+        self.capacity = capacity
+
+        # Atlases and masks of their rendered tiles, by tile size
+        self.atlases = OrderedDict()
+
+    def __len__(self):
+        return len(self.atlases)
+
+    def __contains__(self, tile_size):
+        return tile_size in self.atlases
+
+    def clear(self):
+        self.atlases.clear()
+
+    @staticmethod
+    def index(array, agent_dirs, highlight):
+        """
+        Compute the atlas index of the tiles of encoded cells.
+        Unseen cells are drawn as empty cells.
+
+        :param array: (..., 3) array of cell encodings
+        :param agent_dirs: 0 where there is no agent, agent_dir + 1 otherwise
+        :param highlight: bool array, cells which are highlighted
+        """
+
+        types = array[..., 0].astype(np.int64)
+        types[types == OBJECT_TO_IDX['unseen']] = OBJECT_TO_IDX['empty']
+
+        index = types * len(COLOR_TO_IDX) + array[..., 1]
+        index = index * len(STATE_TO_IDX) + array[..., 2]
+        index = index * 5 + agent_dirs
+        index = index * 2 + highlight
+
+        return index
+
+    def _atlas(self, tile_size):
+        """
+        Get the atlas and rendered tile mask for a tile size,
+        creating them and evicting old atlases as needed
+        """
+
+        if tile_size in self.atlases:
+            self.atlases.move_to_end(tile_size)
+            return self.atlases[tile_size]
+
+        tiles = np.zeros(shape=(self.num_tiles, tile_size, tile_size, 3), dtype=np.uint8)
+        ready = np.zeros(shape=(self.num_tiles,), dtype=bool)
+        self.atlases[tile_size] = (tiles, ready)
+
+        while len(self.atlases) > self.capacity:
+            self.atlases.popitem(last=False)
+
+        return tiles, ready
+
+    def tiles(self, tile_size, indices=()):
+        """
+        Get the atlas for a tile size, making sure the tiles
+        at the given indices have been rendered
+        """
+
+        tiles, ready = self._atlas(tile_size)
+
+        indices = np.asarray(indices, dtype=np.int64)
+        missing = np.unique(indices[~ready[indices]])
+
+        for index in missing.tolist():
+            rest, highlight = divmod(index, 2)
+            rest, agent_dir = divmod(rest, 5)
+            rest, state = divmod(rest, len(STATE_TO_IDX))
+            type_idx, color_idx = divmod(rest, len(COLOR_TO_IDX))
+
+            tiles[index] = Grid.draw_tile(
+                WorldObj.decode(type_idx, color_idx, state),
+                agent_dir=agent_dir - 1 if agent_dir else None,
+                highlight=bool(highlight),
+                tile_size=tile_size
+            )
+            ready[index] = True
+
+        return tiles
+
+    def prewarm(self, tile_sizes, object_types=None):
+        """
+        Render ahead of time the tiles of every encodable object of the
+        given types, with and without the agent and highlighting
+
+        :param tile_sizes: tile sizes in pixels
+        :param object_types: names of the object types, all types by default
+        """
+
+        if object_types is None:
+            object_types = [t for t in OBJECT_TO_IDX if t not in ('unseen', 'agent')]
+
+        encodings = set()
+        for obj_type in object_types:
+            type_idx = OBJECT_TO_IDX[obj_type]
+            num_states = len(STATE_TO_IDX) if obj_type == 'door' else 1
+            for color_idx in range(len(COLOR_TO_IDX)):
+                for state in range(num_states):
+                    obj = WorldObj.decode(type_idx, color_idx, state)
+                    encodings.add(obj.encode() if obj else (OBJECT_TO_IDX['empty'], 0, 0))
+
+        array = np.array(sorted(encodings), dtype=np.int64)[:, np.newaxis, np.newaxis, :]
+        agent_dirs = np.arange(5)[:, np.newaxis]
+        highlight = np.arange(2)
+        indices = self.index(array, agent_dirs, highlight)
+
+        for tile_size in tile_sizes:
+            self.tiles(tile_size, indices)
+
+    def save(self, path):
+        """
+        Save the cached atlases to a .npz file
+        """
+
+        arrays = {}
+        for tile_size, (tiles, ready) in self.atlases.items():
+            arrays['tiles_%d' % tile_size] = tiles
+            arrays['ready_%d' % tile_size] = ready
+
+        np.savez(path, **arrays)
+
+    def load(self, path):
+        """
+        Load atlases saved with `save`, merging them into the cache
+        """
+
+        with np.load(path) as data:
+            for key in data.files:
+                if not key.startswith('tiles_'):
+                    continue
+                tile_size = int(key[len('tiles_'):])
+                loaded_ready = data['ready_%d' % tile_size]
+                loaded_tiles = data[key]
+
+                tiles, ready = self._atlas(tile_size)
+                tiles[loaded_ready] = loaded_tiles[loaded_ready]
+                ready |= loaded_ready
+
 class Grid:
     """
     Represent a grid and operations on it
+
+    The canonical state of the grid is a (width, height, 3) uint8 array
+    holding the (type, color, state) encoding of every cell. WorldObj
+    instances live in a side table so that `get` hands back the very
+    object which was `set`. Cells which only exist in the array (e.g. after
+    `decode` or `slice`) are turned into objects on first access.
     """
 
-    # Static cache of pre-renderer tiles
-    tile_cache = {}
+    # Static cache of pre-rendered tiles
+    tile_cache = TileCache()
+
+    # Lookup table of the object types which can be moved or hold other objects
+    movable_types = np.zeros(256, dtype=bool)
+    movable_types[[OBJECT_TO_IDX[t] for t in ('key', 'ball', 'box')]] = True
 
     def __init__(self, width, height):
         assert width >= 3
@@ -343,21 +588,60 @@ class Grid:
         self.width = width
         self.height = height
 
-        self.grid = [None] * width * height
+        self.array = np.zeros((width, height, 3), dtype='uint8')
+        self.array[:, :, 0] = OBJECT_TO_IDX['empty']
+        self.objs = np.empty((width, height), dtype=object)
+
+        # Zobrist hash of the encoding, computed on first use and then
+        # updated on every change, None when it needs to be recomputed
+        self._zobrist = None
+
+    @classmethod
+    def _from_arrays(cls, array, objs):
+        """
+        Wrap an encoding array and an object table into a grid.
+        The arrays are used as-is, without copying.
+        """
+
+        grid = cls.__new__(cls)
+        grid.width, grid.height = array.shape[:2]
+        grid.array = array
+        grid.objs = objs
+        grid._zobrist = None
+        return grid
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        # Objects do not pickle the cell they are in, see WorldObj.__getstate__
+        for (i, j), v in np.ndenumerate(self.objs):
+            if v is not None:
+                v._grid_cell = (self, i, j)
+
+    @property
+    def grid(self):
+        """
+        Flat list of the grid cells, in row-major order
+        """
+
+        return [self.get(i, j) for j in range(self.height) for i in range(self.width)]
 
     def __contains__(self, key):
         if isinstance(key, WorldObj):
-            for e in self.grid:
+            for e in self.objs.flat:
                 if e is key:
                     return True
         elif isinstance(key, tuple):
-            for e in self.grid:
-                if e is None:
-                    continue
-                if (e.color, e.type) == key:
-                    return True
-                if key[0] is None and key[1] == e.type:
-                    return True
+            color, type = key
+            type_idx = OBJECT_TO_IDX.get(type, 0)
+            if type_idx <= OBJECT_TO_IDX['empty']:
+                return False
+            match = self.array[:, :, 0] == type_idx
+            if color is not None:
+                if color not in COLOR_TO_IDX:
+                    return False
+                match &= self.array[:, :, 1] == COLOR_TO_IDX[color]
+            return bool(match.any())
         return False
 
     def __eq__(self, other):
@@ -372,15 +656,55 @@ class Grid:
         from copy import deepcopy
         return deepcopy(self)
 
+    @property
+    def zobrist(self):
+        """
+        64-bit Zobrist hash of the grid encoding
+        """
+
+        if self._zobrist is None:
+            self._zobrist = zobrist.grid_key(self.array)
+        return self._zobrist
+
+    def _write_cell(self, i, j, encoding):
+        """
+        Write the encoding of a cell, updating the Zobrist hash
+        """
+
+        if self._zobrist is not None:
+            self._zobrist ^= zobrist.cell_key(i, j, self.array[i, j].tolist())
+            self._zobrist ^= zobrist.cell_key(i, j, encoding)
+        self.array[i, j] = encoding
+
     def set(self, i, j, v):
         assert i >= 0 and i < self.width
         assert j >= 0 and j < self.height
-        self.grid[j * self.width + i] = v
+        self.objs[i, j] = v
+        if v is None:
+            self._write_cell(i, j, (OBJECT_TO_IDX['empty'], 0, 0))
+        else:
+            self._write_cell(i, j, v.encode())
+            v._grid_cell = (self, i, j)
 
     def get(self, i, j):
         assert i >= 0 and i < self.width
         assert j >= 0 and j < self.height
-        return self.grid[j * self.width + i]
+        v = self.objs[i, j]
+        if v is None and self.array[i, j, 0] > OBJECT_TO_IDX['empty']:
+            # Materialize objects which are only known by their encoding
+            v = WorldObj.decode(*self.array[i, j].tolist())
+            v._grid_cell = (self, i, j)
+            self.objs[i, j] = v
+        return v
+
+    def empty_cells(self, x0, y0, x1, y1):
+        """
+        Get the positions of the empty cells of the rectangle
+        [x0, x1[ x [y0, y1[, as a (n, 2) array
+        """
+
+        empty = self.array[x0:x1, y0:y1, 0] <= OBJECT_TO_IDX['empty']
+        return np.argwhere(empty) + (x0, y0)
 
     def horz_wall(self, x, y, length=None, obj_type=Wall):
         if length is None:
@@ -405,14 +729,10 @@ class Grid:
         Rotate the grid to the left (counter-clockwise)
         """
 
-        grid = Grid(self.height, self.width)
-
-        for i in range(self.width):
-            for j in range(self.height):
-                v = self.get(i, j)
-                grid.set(j, grid.height - 1 - i, v)
-
-        return grid
+        return Grid._from_arrays(
+            np.ascontiguousarray(np.rot90(self.array, -1)),
+            np.ascontiguousarray(np.rot90(self.objs, -1))
+        )
 
     def slice(self, topX, topY, width, height):
         """
@@ -421,21 +741,36 @@ class Grid:
 
         grid = Grid(width, height)
 
-        for j in range(0, height):
-            for i in range(0, width):
-                x = topX + i
-                y = topY + j
+        # Cells outside of the grid are seen as walls
+        grid.array[:, :] = Wall().encode()
 
-                if x >= 0 and x < self.width and \
-                   y >= 0 and y < self.height:
-                    v = self.get(x, y)
-                else:
-                    v = Wall()
+        x0, y0 = max(topX, 0), max(topY, 0)
+        x1, y1 = min(topX + width, self.width), min(topY + height, self.height)
 
-                grid.set(i, j, v)
+        if x0 < x1 and y0 < y1:
+            grid.array[x0-topX:x1-topX, y0-topY:y1-topY] = self.array[x0:x1, y0:y1]
+            grid.objs[x0-topX:x1-topX, y0-topY:y1-topY] = self.objs[x0:x1, y0:y1]
 
         return grid
 
+    def gather(self, xs, ys):
+        """
+        Get the grid made of the cells at positions (xs[i, j], ys[i, j])
+        Positions outside of the grid are seen as walls
+        """
+
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs = np.where(inside, xs, 0)
+        ys = np.where(inside, ys, 0)
+
+        array = self.array[xs, ys]
+        array[~inside] = Wall().encode()
+
+        objs = self.objs[xs, ys]
+        objs[~inside] = None
+
+        return Grid._from_arrays(array, objs)
+
     @classmethod
     def render_tile(
         cls,
@@ -449,12 +784,30 @@ class Grid:
         Render a tile and cache the result
         """
 
-        # Hash map lookup key for the cache
-        key = (agent_dir, highlight, tile_size)
-        key = obj.encode() + key if obj else key
+        # Only tiles with the default supersampling are cached
+        if subdivs != 3:
+            return cls.draw_tile(obj, agent_dir, highlight, tile_size, subdivs)
 
-        if key in cls.tile_cache:
-            return cls.tile_cache[key]
+        encoding = obj.encode() if obj else (OBJECT_TO_IDX['empty'], 0, 0)
+        index = TileCache.index(
+            np.array(encoding),
+            agent_dir + 1 if agent_dir is not None else 0,
+            highlight
+        )
+
+        return cls.tile_cache.tiles(tile_size, index)[index]
+
+    @staticmethod
+    def draw_tile(
+        obj,
+        agent_dir=None,
+        highlight=False,
+        tile_size=TILE_PIXELS,
+        subdivs=3
+    ):
+        """
+        Draw a tile, without caching
+        """
 
         img = np.zeros(shape=(tile_size * subdivs, tile_size * subdivs, 3), dtype=np.uint8)
 
@@ -484,9 +837,6 @@ class Grid:
         # Downsample the image to perform supersampling/anti-aliasing
         img = downsample(img, subdivs)
 
-        # Cache the rendered tile
-        cls.tile_cache[key] = img
-
         return img
 
     def render(
@@ -494,68 +844,66 @@ class Grid:
         tile_size,
         agent_pos=None,
         agent_dir=None,
-        highlight_mask=None
+        highlight_mask=None,
+        out=None
     ):
         """
         Render this grid at a given scale
         :param r: target renderer object
         :param tile_size: tile size in pixels
+        :param out: optional (height * tile_size, width * tile_size, 3)
+            array into which to render the image
         """
 
         if highlight_mask is None:
-            highlight_mask = np.zeros(shape=(self.width, self.height), dtype=np.bool)
-
-        # Compute the total grid size
-        width_px = self.width * tile_size
-        height_px = self.height * tile_size
-
-        img = np.zeros(shape=(height_px, width_px, 3), dtype=np.uint8)
-
-        # Render the grid
-        for j in range(0, self.height):
-            for i in range(0, self.width):
-                cell = self.get(i, j)
-
-                agent_here = np.array_equal(agent_pos, (i, j))
-                tile_img = Grid.render_tile(
-                    cell,
-                    agent_dir=agent_dir if agent_here else None,
-                    highlight=highlight_mask[i, j],
-                    tile_size=tile_size
-                )
-
-                ymin = j * tile_size
-                ymax = (j+1) * tile_size
-                xmin = i * tile_size
-                xmax = (i+1) * tile_size
-                img[ymin:ymax, xmin:xmax, :] = tile_img
+            highlight_mask = np.zeros(shape=(self.width, self.height), dtype=bool)
+
+        agent_dirs = np.zeros(shape=(self.width, self.height), dtype=np.int64)
+        if agent_pos is not None and agent_dir is not None:
+            i, j = agent_pos
+            if 0 <= i < self.width and 0 <= j < self.height:
+                agent_dirs[i, j] = agent_dir + 1
+
+        # Atlas index of every tile, in image (row, column) order
+        indices = TileCache.index(self.array, agent_dirs, highlight_mask).T
+        tiles = Grid.tile_cache.tiles(tile_size, indices)
+
+        if out is not None:
+            assert out.shape == (self.height * tile_size, self.width * tile_size, 3)
+
+            # Gather the pixel rows of the tiles directly in image order,
+            # viewing the atlas as rows and the image as (row of tiles,
+            # pixel row, column of tiles, pixel column)
+            rows = indices[:, None, :] * tile_size + np.arange(tile_size)[None, :, None]
+            tile_rows = tiles.reshape(-1, tile_size, 3)
+            img = out.reshape(self.height, tile_size, self.width, tile_size, 3)
+            np.take(tile_rows, rows, axis=0, out=img)
+            return out
+
+        # Gather all tiles at once and lay them out into the image
+        img = tiles[indices]
+        img = img.transpose(0, 2, 1, 3, 4)
+        img = img.reshape(self.height * tile_size, self.width * tile_size, 3)
 
         return img
 
-    def encode(self, vis_mask=None):
+    def encode(self, vis_mask=None, out=None):
         """
         Produce a compact numpy encoding of the grid
+
+        The encoding is maintained incrementally by `set` and by objects
+        changing state in place (e.g. doors being opened), so this is
+        only a (masked) copy of the cached array, written into `out` if
+        it is given.
         """
 
         if vis_mask is None:
-            vis_mask = np.ones((self.width, self.height), dtype=bool)
-
-        array = np.zeros((self.width, self.height, 3), dtype='uint8')
-
-        for i in range(self.width):
-            for j in range(self.height):
-                if vis_mask[i, j]:
-                    v = self.get(i, j)
-
-                    if v is None:
-                        array[i, j, 0] = OBJECT_TO_IDX['empty']
-                        array[i, j, 1] = 0
-                        array[i, j, 2] = 0
-
-                    else:
-                        array[i, j, :] = v.encode()
+            if out is None:
+                return self.array.copy()
+            np.copyto(out, self.array)
+            return out
 
-        return array
+        return np.multiply(self.array, vis_mask[:, :, np.newaxis], out=out)
 
     @staticmethod
     def decode(array):
@@ -566,54 +914,29 @@ class Grid:
         width, height, channels = array.shape
         assert channels == 3
 
-        vis_mask = np.ones(shape=(width, height), dtype=np.bool)
+        vis_mask = array[:, :, 0] != OBJECT_TO_IDX['unseen']
 
         grid = Grid(width, height)
-        for i in range(width):
-            for j in range(height):
-                type_idx, color_idx, state = array[i, j]
-                v = WorldObj.decode(type_idx, color_idx, state)
-                grid.set(i, j, v)
-                vis_mask[i, j] = (type_idx != OBJECT_TO_IDX['unseen'])
+        grid.array[:, :] = array
+
+        # Unseen cells decode to empty cells
+        grid.array[array[:, :, 0] <= OBJECT_TO_IDX['empty']] = (OBJECT_TO_IDX['empty'], 0, 0)
 
         return grid, vis_mask
 
     def process_vis(grid, agent_pos):
-        mask = np.zeros(shape=(grid.width, grid.height), dtype=np.bool)
-
-        mask[agent_pos[0], agent_pos[1]] = True
-
-        for j in reversed(range(0, grid.height)):
-            for i in range(0, grid.width-1):
-                if not mask[i, j]:
-                    continue
-
-                cell = grid.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
-
-                mask[i+1, j] = True
-                if j > 0:
-                    mask[i+1, j-1] = True
-                    mask[i, j-1] = True
-
-            for i in reversed(range(1, grid.width)):
-                if not mask[i, j]:
-                    continue
-
-                cell = grid.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
+        # Walls and doors which are not open block the view
+        types = grid.array[:, :, 0]
+        opaque = (types == OBJECT_TO_IDX['wall']) | (
+            (types == OBJECT_TO_IDX['door']) &
+            (grid.array[:, :, 2] != STATE_TO_IDX['open'])
+        )
 
-                mask[i-1, j] = True
-                if j > 0:
-                    mask[i-1, j-1] = True
-                    mask[i, j-1] = True
+        mask = compute_vis_mask(~opaque, agent_pos)
 
-        for j in range(0, grid.height):
-            for i in range(0, grid.width):
-                if not mask[i, j]:
-                    grid.set(i, j, None)
+        grid.array[~mask] = (OBJECT_TO_IDX['empty'], 0, 0)
+        grid.objs[~mask] = None
+        grid._zobrist = None
 
         return mask
 
@@ -644,6 +967,27 @@ class MiniGridEnv(gym.Env):
         # Done completing task
         done = 6
 
+    # Static cache of agent view offsets, see view_offsets
+    view_offsets_cache = {}
+
+    # Source of pregenerated levels used by reset instead of _gen_grid,
+    # an object with a load_level(env) method (see gym_minigrid.levelbank)
+    level_source = None
+
+    # Use rejection sampling in place_obj, as in earlier versions, so that
+    # a given seed generates the same levels as with these versions. When
+    # False, positions are drawn among the empty cells, which does not slow
+    # down on crowded grids but generates different levels.
+    rejection_sampling = True
+
+    # Generate levels with a BatchedRandom generator instead of the legacy
+    # RandomState, which is faster but generates different levels
+    fast_rng = False
+
+    # Length of the 'mission_tokens' observations, None when they are not
+    # generated, see enable_mission_tokens
+    max_mission_tokens = None
+
     def __init__(
         self,
         grid_size=None,
@@ -714,7 +1058,10 @@ class MiniGridEnv(gym.Env):
         # Generate a new random grid at the start of each episode
         # To keep the same grid for each episode, call env.seed() with
         # the same seed before calling env.reset()
-        self._gen_grid(self.width, self.height)
+        if self.level_source is not None:
+            self.level_source.load_level(self)
+        else:
+            self._gen_grid(self.width, self.height)
 
         # These fields should be defined by _gen_grid
         assert self.agent_pos is not None
@@ -734,23 +1081,176 @@ class MiniGridEnv(gym.Env):
         obs = self.gen_obs()
         return obs
 
+    def enable_mission_tokens(self, max_tokens=MAX_MISSION_TOKENS):
+        """
+        Add to the observations the mission as a 'mission_tokens' array
+        of word indices in MISSION_VOCAB (see tokenize_mission). Missions
+        must be strings, environments with other missions (e.g. the goal
+        position arrays of EmptyGoal) raise a TypeError.
+        """
+
+        if not isinstance(self.mission, str):
+            raise TypeError('mission tokens require string missions, not {}'.format(type(self.mission).__name__))
+
+        self.max_mission_tokens = max_tokens
+        self.observation_space.spaces['mission_tokens'] = spaces.Box(
+            low=0,
+            high=len(MISSION_VOCAB) - 1,
+            shape=(max_tokens,),
+            dtype='uint16'
+        )
+
+    @property
+    def mission_tokens(self):
+        """
+        Read-only token array of the current mission, only recomputed
+        when the mission changes
+        """
+
+        if getattr(self, '_tokenized_mission', None) is not self.mission:
+            tokens = tokenize_mission(self.mission, self.max_mission_tokens or MAX_MISSION_TOKENS)
+            tokens.setflags(write=False)
+            self._mission_tokens = tokens
+            self._tokenized_mission = self.mission
+
+        return self._mission_tokens
+
     def seed(self, seed=1337):
         # Seed the random number generator
-        self.np_random, _ = seeding.np_random(seed)
+        if self.fast_rng:
+            self.np_random = BatchedRandom(seed)
+        else:
+            self.np_random, _ = seeding.np_random(seed)
         return [seed]
 
-    def hash(self, size=16):
+    def hash(self, size=16, fast=False):
         """Compute a hash that uniquely identifies the current state of the environment.
+        The hash covers the raw bytes of the grid encoding, the agent pose
+        and the object being carried.
         :param size: Size of the hashing
+        :param fast: Use the incremental 64-bit Zobrist hash `state_key`
+            instead of SHA-256, giving at most 16 hex digits
         """
+        if fast:
+            return ('%016x' % self.state_key)[:size]
+
         sample_hash = hashlib.sha256()
 
-        to_encode = [self.grid.encode(), self.agent_pos, self.agent_dir]
-        for item in to_encode:
-            sample_hash.update(str(item).encode('utf8'))
+        carrying = self.carrying.encode() if self.carrying else (0, 0, 0)
+        pose = (
+            self.grid.width, self.grid.height,
+            *self.agent_pos, self.agent_dir,
+            *carrying
+        )
+
+        sample_hash.update(self.grid.array.tobytes())
+        sample_hash.update(np.array(pose, dtype=np.int64).tobytes())
 
         return sample_hash.hexdigest()[:size]
 
+    def get_state(self):
+        """
+        Take a snapshot of the state of the environment, which can be
+        restored with `set_state`. The snapshot holds the grid encoding,
+        the agent state, the RNG state and the objects which can move or
+        change state, so that objects referenced by the environment keep
+        their identity when the snapshot is restored. Subclasses holding
+        additional episode state should extend both methods.
+
+        Snapshots can be pickled. The attributes of the environment which
+        reference objects (e.g. the target object of the mission) are part
+        of the snapshot, so that they are bound to the objects of the grid
+        when a snapshot is restored in another process. Level generation
+        bookkeeping, such as the rooms of RoomGrid environments, is not.
+        """
+
+        grid = self.grid
+
+        # Objects which can be moved around or hold other objects
+        movable = Grid.movable_types[grid.array[:, :, 0]]
+        objects = [o for o in grid.objs[movable] if o is not None]
+        if self.carrying:
+            objects.append(self.carrying)
+        objects += [o.contains for o in objects if o.contains]
+
+        # Attributes referencing objects or lists of objects
+        attrs = {}
+        for name, value in vars(self).items():
+            if isinstance(value, WorldObj):
+                attrs[name] = value
+            elif isinstance(value, list) and value and all(isinstance(v, WorldObj) for v in value):
+                attrs[name] = list(value)
+
+        agent_pos = self.agent_pos
+        if isinstance(agent_pos, np.ndarray):
+            agent_pos = agent_pos.copy()
+
+        return {
+            'grid': grid.array.copy(),
+            'objs': grid.objs.copy(),
+            'zobrist': grid._zobrist,
+            'objects': [(o, o.cur_pos, o.contains) for o in objects],
+            'attrs': attrs,
+            'agent_pos': agent_pos,
+            'agent_dir': self.agent_dir,
+            'carrying': self.carrying,
+            'step_count': self.step_count,
+            'mission': self.mission,
+            'rng': self.np_random.get_state(),
+        }
+
+    def set_state(self, state):
+        """
+        Restore a snapshot taken with `get_state`
+        """
+
+        array = state['grid']
+        if self.grid.array.shape != array.shape:
+            self.grid = Grid(*array.shape[:2])
+
+        grid = self.grid
+        grid.array[:, :] = array
+        grid.objs[:, :] = state['objs']
+        grid._zobrist = state['zobrist']
+
+        for obj, cur_pos, contains in state['objects']:
+            obj.cur_pos = cur_pos
+            obj.contains = contains
+
+        # Doors are the only objects whose state is held by the encoding
+        xs, ys = np.nonzero(array[:, :, 0] == OBJECT_TO_IDX['door'])
+        doors = zip(xs.tolist(), ys.tolist(), grid.objs[xs, ys], array[xs, ys, 2].tolist())
+        for i, j, door, door_state in doors:
+            if door is not None:
+                door._grid_cell = (grid, i, j)
+                door._is_open = door_state == STATE_TO_IDX['open']
+                door._is_locked = door_state == STATE_TO_IDX['locked']
+
+        agent_pos = state['agent_pos']
+        if isinstance(agent_pos, np.ndarray):
+            agent_pos = agent_pos.copy()
+
+        for name, value in state['attrs'].items():
+            setattr(self, name, list(value) if isinstance(value, list) else value)
+
+        self.agent_pos = agent_pos
+        self.agent_dir = state['agent_dir']
+        self.carrying = state['carrying']
+        self.step_count = state['step_count']
+        self.mission = state['mission']
+        self.np_random.set_state(state['rng'])
+
+    @property
+    def state_key(self):
+        """
+        64-bit Zobrist hash of the grid encoding, the agent pose and the
+        object being carried. The grid part is updated incrementally as the
+        grid changes, so this does not re-encode the grid.
+        """
+
+        carrying = self.carrying.encode() if self.carrying else None
+        return self.grid.zobrist ^ zobrist.agent_key(self.agent_pos, self.agent_dir, carrying)
+
     @property
     def steps_remaining(self):
         return self.max_steps - self.step_count
@@ -852,7 +1352,10 @@ class MiniGridEnv(gym.Env):
         Pick a random element in a list
         """
 
-        lst = list(iterable)
+        if isinstance(iterable, (list, tuple)):
+            lst = iterable
+        else:
+            lst = list(iterable)
         idx = self._rand_int(0, len(lst))
         return lst[idx]
 
@@ -864,6 +1367,13 @@ class MiniGridEnv(gym.Env):
         lst = list(iterable)
         assert num_elems <= len(lst)
 
+        if isinstance(self.np_random, BatchedRandom):
+            # Partial Fisher-Yates shuffle
+            for i in range(num_elems):
+                j = self._rand_int(i, len(lst))
+                lst[i], lst[j] = lst[j], lst[i]
+            return lst[:num_elems]
+
         out = []
 
         while len(out) < num_elems:
@@ -913,6 +1423,57 @@ class MiniGridEnv(gym.Env):
         if size is None:
             size = (self.grid.width, self.grid.height)
 
+        if self.rejection_sampling:
+            pos = self._place_obj_rejection(top, size, reject_fn, max_tries)
+        else:
+            pos = self._place_obj_free_cells(top, size, reject_fn, max_tries)
+
+        self.grid.set(*pos, obj)
+
+        if obj is not None:
+            obj.init_pos = pos
+            obj.cur_pos = pos
+
+        return pos
+
+    def _place_obj_free_cells(self, top, size, reject_fn, max_tries):
+        """
+        Sample a position uniformly among the empty cells of a rectangle
+        which are not rejected, drawing again only when reject_fn rejects
+        a position
+        """
+
+        x0, y0 = top
+        x1 = min(top[0] + size[0], self.grid.width)
+        y1 = min(top[1] + size[1], self.grid.height)
+
+        cells = self.grid.empty_cells(x0, y0, x1, y1)
+        if self.agent_pos is not None:
+            cells = cells[(cells[:, 0] != self.agent_pos[0]) | (cells[:, 1] != self.agent_pos[1])]
+
+        num_tries = 0
+
+        while True:
+            if len(cells) == 0 or num_tries > max_tries:
+                raise RecursionError('rejection sampling failed in place_obj')
+
+            num_tries += 1
+
+            idx = self._rand_int(0, len(cells))
+            pos = cells[idx]
+
+            # Check if there is a filtering criterion
+            if reject_fn and reject_fn(self, pos):
+                cells = np.delete(cells, idx, axis=0)
+                continue
+
+            return pos
+
+    def _place_obj_rejection(self, top, size, reject_fn, max_tries):
+        """
+        Sample positions in a rectangle until one is valid
+        """
+
         num_tries = 0
 
         while True:
@@ -940,15 +1501,7 @@ class MiniGridEnv(gym.Env):
             if reject_fn and reject_fn(self, pos):
                 continue
 
-            break
-
-        self.grid.set(*pos, obj)
-
-        if obj is not None:
-            obj.init_pos = pos
-            obj.cur_pos = pos
-
-        return pos
+            return pos
 
     def put_obj(self, obj, i, j):
         """
@@ -1165,6 +1718,29 @@ class MiniGridEnv(gym.Env):
 
         return obs, reward, done, {}
 
+    @classmethod
+    def view_offsets(cls, agent_view_size, agent_dir):
+        """
+        Get the offsets from the agent position to the world coordinates of
+        every cell of the agent's view. The view is oriented so that the
+        agent stands at the bottom middle of it, facing up.
+        """
+
+        key = (agent_view_size, agent_dir)
+        if key in cls.view_offsets_cache:
+            return cls.view_offsets_cache[key]
+
+        dx, dy = DIR_TO_VEC[agent_dir]
+        rx, ry = -dy, dx
+
+        vi, vj = np.meshgrid(np.arange(agent_view_size), np.arange(agent_view_size), indexing='ij')
+        fwd = agent_view_size - 1 - vj
+        side = vi - agent_view_size // 2
+        offsets = (dx * fwd + rx * side, dy * fwd + ry * side)
+
+        cls.view_offsets_cache[key] = offsets
+        return offsets
+
     def gen_obs_grid(self):
         """
         Generate the sub-grid observed by the agent.
@@ -1172,19 +1748,17 @@ class MiniGridEnv(gym.Env):
         cells the agent can actually see.
         """
 
-        topX, topY, botX, botY = self.get_view_exts()
-
-        grid = self.grid.slice(topX, topY, self.agent_view_size, self.agent_view_size)
-
-        for i in range(self.agent_dir + 1):
-            grid = grid.rotate_left()
+        # Gather the view with a single indexing operation, which is
+        # equivalent to slicing the view area and rotating it
+        off_x, off_y = self.view_offsets(self.agent_view_size, self.agent_dir)
+        grid = self.grid.gather(self.agent_pos[0] + off_x, self.agent_pos[1] + off_y)
 
         # Process occluders and visibility
         # Note that this incurs some performance cost
         if not self.see_through_walls:
             vis_mask = grid.process_vis(agent_pos=(self.agent_view_size // 2 , self.agent_view_size - 1))
         else:
-            vis_mask = np.ones(shape=(grid.width, grid.height), dtype=np.bool)
+            vis_mask = np.ones(shape=(grid.width, grid.height), dtype=bool)
 
         # Make it so the agent sees what it's carrying
         # We do this by placing the carried object at the agent's position
@@ -1219,9 +1793,12 @@ class MiniGridEnv(gym.Env):
             'mission': self.mission
         }
 
+        if self.max_mission_tokens is not None:
+            obs['mission_tokens'] = self.mission_tokens
+
         return obs
 
-    def get_obs_render(self, obs, tile_size=TILE_PIXELS//2):
+    def get_obs_render(self, obs, tile_size=TILE_PIXELS//2, out=None):
         """
         Render an agent observation for visualization
         """
@@ -1233,12 +1810,13 @@ class MiniGridEnv(gym.Env):
             tile_size,
             agent_pos=(self.agent_view_size // 2, self.agent_view_size - 1),
             agent_dir=3,
-            highlight_mask=vis_mask
+            highlight_mask=vis_mask,
+            out=out
         )
 
         return img
 
-    def render(self, mode='human', close=False, highlight=True, tile_size=TILE_PIXELS):
+    def render(self, mode='human', close=False, highlight=True, tile_size=TILE_PIXELS, out=None):
         """
         Render the whole-grid human view
         """
@@ -1253,42 +1831,29 @@ class MiniGridEnv(gym.Env):
             self.window = gym_minigrid.window.Window('gym_minigrid')
             self.window.show(block=False)
 
-        # Compute which cells are visible to the agent
-        _, vis_mask = self.gen_obs_grid()
-
-        # Compute the world coordinates of the bottom-left corner
-        # of the agent's view area
-        f_vec = self.dir_vec
-        r_vec = self.right_vec
-        top_left = self.agent_pos + f_vec * (self.agent_view_size-1) - r_vec * (self.agent_view_size // 2)
-
         # Mask of which cells to highlight
-        highlight_mask = np.zeros(shape=(self.width, self.height), dtype=np.bool)
-
-        # For each cell in the visibility mask
-        for vis_j in range(0, self.agent_view_size):
-            for vis_i in range(0, self.agent_view_size):
-                # If this cell is not visible, don't highlight it
-                if not vis_mask[vis_i, vis_j]:
-                    continue
+        highlight_mask = None
 
-                # Compute the world coordinates of this cell
-                abs_i, abs_j = top_left - (f_vec * vis_j) + (r_vec * vis_i)
+        if highlight:
+            # Compute which cells are visible to the agent
+            _, vis_mask = self.gen_obs_grid()
 
-                if abs_i < 0 or abs_i >= self.width:
-                    continue
-                if abs_j < 0 or abs_j >= self.height:
-                    continue
+            # Compute the world coordinates of the visible cells
+            off_x, off_y = self.view_offsets(self.agent_view_size, self.agent_dir)
+            abs_i = self.agent_pos[0] + off_x[vis_mask]
+            abs_j = self.agent_pos[1] + off_y[vis_mask]
+            inside = (abs_i >= 0) & (abs_i < self.width) & (abs_j >= 0) & (abs_j < self.height)
 
-                # Mark this cell to be highlighted
-                highlight_mask[abs_i, abs_j] = True
+            highlight_mask = np.zeros(shape=(self.width, self.height), dtype=bool)
+            highlight_mask[abs_i[inside], abs_j[inside]] = True
 
         # Render the whole grid
         img = self.grid.render(
             tile_size,
             self.agent_pos,
             self.agent_dir,
-            highlight_mask=highlight_mask if highlight else None
+            highlight_mask=highlight_mask,
+            out=out
         )
 
         if mode == 'human':
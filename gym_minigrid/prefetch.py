@@ -0,0 +1,141 @@
+import copy
+import queue
+import threading
+import gym
+from gym.utils import seeding
+from .rng import BatchedRandom
+from .levelbank import level_fields
+
+class LevelPrefetcher:
+    """
+    Level source generating levels in a background thread, keeping a
+    bounded queue of levels ready so that `reset` only has to pop one.
+
+    Levels are generated by a copy of the environment, starting from the
+    state of its RNG when `start` is called. The levels are thus the ones
+    the environment would generate itself over successive resets, as long
+    as its RNG is only used to generate levels. The RNG of the environment
+    is set to the state it would have after generating each level.
+
+    A level is made of the grid, the agent pose, the mission and the other
+    fields describing it (see `levelbank.level_fields`).
+    """
+
+    def __init__(self, env, queue_size=8):
+        assert queue_size >= 1
+        self.queue_size = queue_size
+        self.thread = None
+        self.start(env)
+
+    def start(self, env):
+        """
+        (Re)start generating levels from the current state of an environment
+        """
+
+        self.stop()
+
+        # The copy gets a new RNG in the same state, deep copies of some
+        # RNGs (e.g. those of gym.utils.seeding) lose their legacy methods
+        rng = env.np_random
+        gen_rng = BatchedRandom() if isinstance(rng, BatchedRandom) else seeding.np_random()[0]
+        gen_rng.set_state(rng.get_state())
+
+        # The copy must not prefetch levels itself
+        level_source = env.level_source
+        env.level_source = None
+        try:
+            gen_env = copy.deepcopy(env, {id(rng): gen_rng})
+        finally:
+            env.level_source = level_source
+
+        self.levels = queue.Queue(maxsize=self.queue_size)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._generate,
+            args=(gen_env, self.levels, self.stop_event),
+            daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and drop the levels already generated
+        """
+
+        if self.thread is None:
+            return
+
+        self.stop_event.set()
+
+        # Unblock the thread if it is waiting for a free slot
+        while self.thread.is_alive():
+            try:
+                self.levels.get(timeout=0.01)
+            except queue.Empty:
+                pass
+
+        self.thread.join()
+        self.thread = None
+
+    @staticmethod
+    def _generate(env, levels, stop_event):
+        try:
+            while not stop_event.is_set():
+                env.agent_pos = None
+                env.agent_dir = None
+                env._gen_grid(env.width, env.height)
+
+                # Copied at once, so that the fields keep sharing objects
+                # with the grid and the next generation cannot mutate them
+                level = level_fields(env)
+                level['grid'] = env.grid
+                level['mission'] = env.mission
+                level['agent_pos'] = env.agent_pos
+                level['agent_dir'] = env.agent_dir
+                level = copy.deepcopy(level)
+                rng_state = env.np_random.get_state()
+
+                while not stop_event.is_set():
+                    try:
+                        levels.put((level, rng_state), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            levels.put((e, None))
+
+    def load_level(self, env):
+        """
+        Load the next generated level into an environment
+        """
+
+        level, rng_state = self.levels.get()
+        if isinstance(level, Exception):
+            raise level
+
+        for name, value in level.items():
+            setattr(env, name, value)
+        env.np_random.set_state(rng_state)
+
+class PrefetchWrapper(gym.core.Wrapper):
+    """
+    Wrapper generating the levels of the environment in a background
+    thread, so that resetting does not wait for a level to be generated.
+    Seeding through the wrapper restarts the generation from the new seed.
+    """
+
+    def __init__(self, env, queue_size=8):
+        super().__init__(env)
+
+        self.prefetcher = LevelPrefetcher(self.unwrapped, queue_size)
+        self.unwrapped.level_source = self.prefetcher
+
+    def seed(self, *args, **kwargs):
+        seeds = self.env.seed(*args, **kwargs)
+        self.prefetcher.start(self.unwrapped)
+        return seeds
+
+    def close(self):
+        self.prefetcher.stop()
+        self.unwrapped.level_source = None
+        return self.env.close()
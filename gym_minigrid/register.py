@@ -2,6 +2,99 @@ from gym.envs.registration import register as gym_register
 
 env_list = []
 
+# Environments of the package, registered when gym_minigrid is imported.
+# Entry points name the module defining each environment, so that gym.make
+# only imports the module of the environment being made.
+ENV_ENTRY_POINTS = [
+    ('MiniGrid-Empty-5x5-v0', 'gym_minigrid.envs.empty:EmptyEnv5x5'),
+    ('MiniGrid-Empty-Random-5x5-v0', 'gym_minigrid.envs.empty:EmptyRandomEnv5x5'),
+    ('MiniGrid-Empty-6x6-v0', 'gym_minigrid.envs.empty:EmptyEnv6x6'),
+    ('MiniGrid-Empty-Random-6x6-v0', 'gym_minigrid.envs.empty:EmptyRandomEnv6x6'),
+    ('MiniGrid-Empty-8x8-v0', 'gym_minigrid.envs.empty:EmptyEnv'),
+    ('MiniGrid-Empty-16x16-v0', 'gym_minigrid.envs.empty:EmptyEnv16x16'),
+    ('MiniGrid-DoorKey-5x5-v0', 'gym_minigrid.envs.doorkey:DoorKeyEnv5x5'),
+    ('MiniGrid-DoorKey-6x6-v0', 'gym_minigrid.envs.doorkey:DoorKeyEnv6x6'),
+    ('MiniGrid-DoorKey-8x8-v0', 'gym_minigrid.envs.doorkey:DoorKeyEnv'),
+    ('MiniGrid-DoorKey-16x16-v0', 'gym_minigrid.envs.doorkey:DoorKeyEnv16x16'),
+    ('MiniGrid-MultiRoom-N2-S4-v0', 'gym_minigrid.envs.multiroom:MultiRoomEnvN2S4'),
+    ('MiniGrid-MultiRoom-N4-S5-v0', 'gym_minigrid.envs.multiroom:MultiRoomEnvN4S5'),
+    ('MiniGrid-MultiRoom-N6-v0', 'gym_minigrid.envs.multiroom:MultiRoomEnvN6'),
+    ('MiniGrid-Fetch-5x5-N2-v0', 'gym_minigrid.envs.fetch:FetchEnv5x5N2'),
+    ('MiniGrid-Fetch-6x6-N2-v0', 'gym_minigrid.envs.fetch:FetchEnv6x6N2'),
+    ('MiniGrid-Fetch-8x8-N3-v0', 'gym_minigrid.envs.fetch:FetchEnv'),
+    ('MiniGrid-GoToObject-6x6-N2-v0', 'gym_minigrid.envs.gotoobject:GoToObjectEnv'),
+    ('MiniGrid-GoToObject-8x8-N2-v0', 'gym_minigrid.envs.gotoobject:GotoEnv8x8N2'),
+    ('MiniGrid-GoToDoor-5x5-v0', 'gym_minigrid.envs.gotodoor:GoToDoorEnv'),
+    ('MiniGrid-GoToDoor-6x6-v0', 'gym_minigrid.envs.gotodoor:GoToDoor6x6Env'),
+    ('MiniGrid-GoToDoor-8x8-v0', 'gym_minigrid.envs.gotodoor:GoToDoor8x8Env'),
+    ('MiniGrid-PutNear-6x6-N2-v0', 'gym_minigrid.envs.putnear:PutNearEnv'),
+    ('MiniGrid-PutNear-8x8-N3-v0', 'gym_minigrid.envs.putnear:PutNear8x8N3'),
+    ('MiniGrid-LockedRoom-v0', 'gym_minigrid.envs.lockedroom:LockedRoom'),
+    ('MiniGrid-KeyCorridorS3R1-v0', 'gym_minigrid.envs.keycorridor:KeyCorridorS3R1'),
+    ('MiniGrid-KeyCorridorS3R2-v0', 'gym_minigrid.envs.keycorridor:KeyCorridorS3R2'),
+    ('MiniGrid-KeyCorridorS3R3-v0', 'gym_minigrid.envs.keycorridor:KeyCorridorS3R3'),
+    ('MiniGrid-KeyCorridorS4R3-v0', 'gym_minigrid.envs.keycorridor:KeyCorridorS4R3'),
+    ('MiniGrid-KeyCorridorS5R3-v0', 'gym_minigrid.envs.keycorridor:KeyCorridorS5R3'),
+    ('MiniGrid-KeyCorridorS6R3-v0', 'gym_minigrid.envs.keycorridor:KeyCorridorS6R3'),
+    ('MiniGrid-Unlock-v0', 'gym_minigrid.envs.unlock:Unlock'),
+    ('MiniGrid-UnlockPickup-v0', 'gym_minigrid.envs.unlockpickup:UnlockPickup'),
+    ('MiniGrid-BlockedUnlockPickup-v0', 'gym_minigrid.envs.blockedunlockpickup:BlockedUnlockPickup'),
+    ('MiniGrid-Playground-v0', 'gym_minigrid.envs.playground_v0:PlaygroundV0'),
+    ('MiniGrid-RedBlueDoors-6x6-v0', 'gym_minigrid.envs.redbluedoors:RedBlueDoorEnv6x6'),
+    ('MiniGrid-RedBlueDoors-8x8-v0', 'gym_minigrid.envs.redbluedoors:RedBlueDoorEnv'),
+    ('MiniGrid-ObstructedMaze-1Dl-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_1Dl'),
+    ('MiniGrid-ObstructedMaze-1Dlh-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_1Dlh'),
+    ('MiniGrid-ObstructedMaze-1Dlhb-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_1Dlhb'),
+    ('MiniGrid-ObstructedMaze-2Dl-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_2Dl'),
+    ('MiniGrid-ObstructedMaze-2Dlh-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_2Dlh'),
+    ('MiniGrid-ObstructedMaze-2Dlhb-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_2Dlhb'),
+    ('MiniGrid-ObstructedMaze-1Q-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_1Q'),
+    ('MiniGrid-ObstructedMaze-2Q-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_2Q'),
+    ('MiniGrid-ObstructedMaze-Full-v0', 'gym_minigrid.envs.obstructedmaze:ObstructedMaze_Full'),
+    ('MiniGrid-MemoryS17Random-v0', 'gym_minigrid.envs.memory:MemoryS17Random'),
+    ('MiniGrid-MemoryS13Random-v0', 'gym_minigrid.envs.memory:MemoryS13Random'),
+    ('MiniGrid-MemoryS13-v0', 'gym_minigrid.envs.memory:MemoryS13'),
+    ('MiniGrid-MemoryS11-v0', 'gym_minigrid.envs.memory:MemoryS11'),
+    ('MiniGrid-MemoryS9-v0', 'gym_minigrid.envs.memory:MemoryS9'),
+    ('MiniGrid-MemoryS7-v0', 'gym_minigrid.envs.memory:MemoryS7'),
+    ('MiniGrid-FourRooms-v0', 'gym_minigrid.envs.fourrooms:FourRoomsEnv'),
+    ('MiniGrid-LavaCrossingS9N1-v0', 'gym_minigrid.envs.crossing:LavaCrossingEnv'),
+    ('MiniGrid-LavaCrossingS9N2-v0', 'gym_minigrid.envs.crossing:LavaCrossingS9N2Env'),
+    ('MiniGrid-LavaCrossingS9N3-v0', 'gym_minigrid.envs.crossing:LavaCrossingS9N3Env'),
+    ('MiniGrid-LavaCrossingS11N5-v0', 'gym_minigrid.envs.crossing:LavaCrossingS11N5Env'),
+    ('MiniGrid-SimpleCrossingS9N1-v0', 'gym_minigrid.envs.crossing:SimpleCrossingEnv'),
+    ('MiniGrid-SimpleCrossingS9N2-v0', 'gym_minigrid.envs.crossing:SimpleCrossingS9N2Env'),
+    ('MiniGrid-SimpleCrossingS9N3-v0', 'gym_minigrid.envs.crossing:SimpleCrossingS9N3Env'),
+    ('MiniGrid-SimpleCrossingS11N5-v0', 'gym_minigrid.envs.crossing:SimpleCrossingS11N5Env'),
+    ('MiniGrid-LavaGapS5-v0', 'gym_minigrid.envs.lavagap:LavaGapS5Env'),
+    ('MiniGrid-LavaGapS6-v0', 'gym_minigrid.envs.lavagap:LavaGapS6Env'),
+    ('MiniGrid-LavaGapS7-v0', 'gym_minigrid.envs.lavagap:LavaGapS7Env'),
+    ('MiniGrid-Dynamic-Obstacles-5x5-v0', 'gym_minigrid.envs.dynamicobstacles:DynamicObstaclesEnv5x5'),
+    ('MiniGrid-Dynamic-Obstacles-Random-5x5-v0', 'gym_minigrid.envs.dynamicobstacles:DynamicObstaclesRandomEnv5x5'),
+    ('MiniGrid-Dynamic-Obstacles-6x6-v0', 'gym_minigrid.envs.dynamicobstacles:DynamicObstaclesEnv6x6'),
+    ('MiniGrid-Dynamic-Obstacles-Random-6x6-v0', 'gym_minigrid.envs.dynamicobstacles:DynamicObstaclesRandomEnv6x6'),
+    ('MiniGrid-Dynamic-Obstacles-8x8-v0', 'gym_minigrid.envs.dynamicobstacles:DynamicObstaclesEnv'),
+    ('MiniGrid-Dynamic-Obstacles-16x16-v0', 'gym_minigrid.envs.dynamicobstacles:DynamicObstaclesEnv16x16'),
+    ('MiniGrid-DistShift1-v0', 'gym_minigrid.envs.distshift:DistShift1'),
+    ('MiniGrid-DistShift2-v0', 'gym_minigrid.envs.distshift:DistShift2'),
+    ('MiniGrid-EmptyGoal-5x5-v0', 'gym_minigrid.envs.emptygoal:EmptyGoalEnv5x5'),
+    ('MiniGrid-EmptyGoal-Random-5x5-v0', 'gym_minigrid.envs.emptygoal:EmptyRandomGoalEnv5x5'),
+    ('MiniGrid-EmptyGoal-6x6-v0', 'gym_minigrid.envs.emptygoal:EmptyGoalEnv6x6'),
+    ('MiniGrid-EmptyGoal-Random-6x6-v0', 'gym_minigrid.envs.emptygoal:EmptyRandomGoalEnv6x6'),
+    ('MiniGrid-EmptyGoal-8x8-v0', 'gym_minigrid.envs.emptygoal:EmptyGoalEnv'),
+    ('MiniGrid-EmptyGoal-16x16-v0', 'gym_minigrid.envs.emptygoal:EmptyGoalEnv16x16'),
+    ('MiniGrid-FourCorridors1-v0', 'gym_minigrid.envs.fourcorridors:FourCorridorsEnv1'),
+    ('MiniGrid-FourCorridors2-v0', 'gym_minigrid.envs.fourcorridors:FourCorridorsEnv2'),
+    ('MiniGrid-FourCorridors3-v0', 'gym_minigrid.envs.fourcorridors:FourCorridorsEnv3'),
+    ('MiniGrid-FourCorridors4-v0', 'gym_minigrid.envs.fourcorridors:FourCorridorsEnv4'),
+    ('MiniGrid-EmptyNoGoal-5x5-v0', 'gym_minigrid.envs.emptynogoal:EmptyNoGoalEnv5x5'),
+    ('MiniGrid-EmptyNoGoal-Random-5x5-v0', 'gym_minigrid.envs.emptynogoal:EmptyNoGoalRandomEnv5x5'),
+    ('MiniGrid-EmptyNoGoal-6x6-v0', 'gym_minigrid.envs.emptynogoal:EmptyNoGoalEnv6x6'),
+    ('MiniGrid-EmptyNoGoal-Random-6x6-v0', 'gym_minigrid.envs.emptynogoal:EmptyNoGoalRandomEnv6x6'),
+    ('MiniGrid-EmptyNoGoal-8x8-v0', 'gym_minigrid.envs.emptynogoal:EmptyNoGoalEnv'),
+    ('MiniGrid-EmptyNoGoal-16x16-v0', 'gym_minigrid.envs.emptynogoal:EmptyNoGoalEnv16x16'),
+]
+
 def register(
     id,
     entry_point,
@@ -19,3 +112,11 @@ def register(
 
     # Add the environment to the set
     env_list.append(id)
+
+def register_envs():
+    """
+    Register the environments of ENV_ENTRY_POINTS, without importing them
+    """
+
+    for id, entry_point in ENV_ENTRY_POINTS:
+        register(id, entry_point)
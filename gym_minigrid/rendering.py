@@ -15,17 +15,35 @@ def downsample(img, factor):
 
     return img
 
+# Pixel center coordinates, indexed by image height and width
+_coords_cache = {}
+
+def pixel_coords(height, width):
+    """
+    Get the coordinates of the pixel centers of an image, normalized
+    to [0, 1], as two (height, width) arrays
+    """
+
+    key = (height, width)
+    if key not in _coords_cache:
+        yf = (np.arange(height) + 0.5) / height
+        xf = (np.arange(width) + 0.5) / width
+        xf, yf = np.meshgrid(xf, yf)
+        xf.setflags(write=False)
+        yf.setflags(write=False)
+        _coords_cache[key] = (xf, yf)
+
+    return _coords_cache[key]
+
 def fill_coords(img, fn, color):
     """
-    Fill pixels of an image with coordinates matching a filter function
+    Fill pixels of an image with coordinates matching a filter function.
+    The filter function is evaluated on the coordinates of all the
+    pixels at once and must return a boolean mask.
     """
 
-    for y in range(img.shape[0]):
-        for x in range(img.shape[1]):
-            yf = (y + 0.5) / img.shape[0]
-            xf = (x + 0.5) / img.shape[1]
-            if fn(xf, yf):
-                img[y, x] = color
+    xf, yf = pixel_coords(img.shape[0], img.shape[1])
+    img[fn(xf, yf)] = color
 
     return img
 
@@ -42,11 +60,11 @@ def rotate_fn(fin, cx, cy, theta):
     return fout
 
 def point_in_line(x0, y0, x1, y1, r):
-    p0 = np.array([x0, y0])
-    p1 = np.array([x1, y1])
-    dir = p1 - p0
-    dist = np.linalg.norm(dir)
-    dir = dir / dist
+    dir_x = x1 - x0
+    dir_y = y1 - y0
+    dist = math.sqrt(dir_x * dir_x + dir_y * dir_y)
+    dir_x = dir_x / dist
+    dir_y = dir_y / dist
 
     xmin = min(x0, x1) - r
     xmax = max(x0, x1) + r
@@ -54,20 +72,14 @@ def point_in_line(x0, y0, x1, y1, r):
     ymax = max(y0, y1) + r
 
     def fn(x, y):
-        # Fast, early escape test
-        if x < xmin or x > xmax or y < ymin or y > ymax:
-            return False
-
-        q = np.array([x, y])
-        pq = q - p0
-
         # Closest point on line
-        a = np.dot(pq, dir)
+        a = (x - x0) * dir_x + (y - y0) * dir_y
         a = np.clip(a, 0, dist)
-        p = p0 + a * dir
+        dx = x - (x0 + a * dir_x)
+        dy = y - (y0 + a * dir_y)
 
-        dist_to_line = np.linalg.norm(q - p)
-        return dist_to_line <= r
+        dist_to_line = np.sqrt(dx * dx + dy * dy)
+        return (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax) & (dist_to_line <= r)
 
     return fn
 
@@ -78,33 +90,32 @@ def point_in_circle(cx, cy, r):
 
 def point_in_rect(xmin, xmax, ymin, ymax):
     def fn(x, y):
-        return x >= xmin and x <= xmax and y >= ymin and y <= ymax
+        return (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
     return fn
 
 def point_in_triangle(a, b, c):
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
+    ax, ay = a
+    v0x, v0y = c[0] - ax, c[1] - ay
+    v1x, v1y = b[0] - ax, b[1] - ay
 
-    def fn(x, y):
-        v0 = c - a
-        v1 = b - a
-        v2 = np.array((x, y)) - a
+    # Dot products which do not depend on the point
+    dot00 = v0x * v0x + v0y * v0y
+    dot01 = v0x * v1x + v0y * v1y
+    dot11 = v1x * v1x + v1y * v1y
+    inv_denom = 1 / (dot00 * dot11 - dot01 * dot01)
 
-        # Compute dot products
-        dot00 = np.dot(v0, v0)
-        dot01 = np.dot(v0, v1)
-        dot02 = np.dot(v0, v2)
-        dot11 = np.dot(v1, v1)
-        dot12 = np.dot(v1, v2)
+    def fn(x, y):
+        v2x = x - ax
+        v2y = y - ay
+        dot02 = v0x * v2x + v0y * v2y
+        dot12 = v1x * v2x + v1y * v2y
 
         # Compute barycentric coordinates
-        inv_denom = 1 / (dot00 * dot11 - dot01 * dot01)
         u = (dot11 * dot02 - dot01 * dot12) * inv_denom
         v = (dot00 * dot12 - dot01 * dot02) * inv_denom
 
         # Check if point is in triangle
-        return (u >= 0) and (v >= 0) and (u + v) < 1
+        return (u >= 0) & (v >= 0) & ((u + v) < 1)
 
     return fn
 
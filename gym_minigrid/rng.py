@@ -0,0 +1,69 @@
+import numpy as np
+
+# Random number generator used by environments in fast RNG mode. Level
+# generation draws many scalars one at a time, and each call into numpy
+# has a fixed overhead much larger than the cost of the draw itself, so
+# scalar draws are served from a buffer of uniform floats which is
+# refilled in batches from a numpy Generator.
+
+class BatchedRandom:
+    """
+    Random number generator implementing the subset of the RandomState
+    interface used by the environments, backed by a PCG64 Generator
+    """
+
+    def __init__(self, seed=None, batch_size=1024):
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.batch_size = batch_size
+
+        # Uniform floats in [0, 1[, consumed from the end
+        self._buffer = []
+
+    def random(self):
+        """
+        Generate a random float in [0, 1[
+        """
+
+        if not self._buffer:
+            self._buffer = self.generator.random(self.batch_size).tolist()
+        return self._buffer.pop()
+
+    def randint(self, low, high=None, size=None):
+        """
+        Generate random integers in [low, high[
+        """
+
+        if high is None:
+            low, high = 0, low
+        if size is not None:
+            return self.generator.integers(low, high, size)
+        if low >= high:
+            raise ValueError('low >= high')
+
+        return int(low + int(self.random() * (high - low)))
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        """
+        Generate random floats in [low, high[
+        """
+
+        if size is not None:
+            return self.generator.uniform(low, high, size)
+
+        return low + self.random() * (high - low)
+
+    def shuffle(self, x):
+        self.generator.shuffle(x)
+
+    def choice(self, a, size=None, replace=True, p=None):
+        return self.generator.choice(a, size, replace, p)
+
+    def get_state(self):
+        return {
+            'generator': self.generator.bit_generator.state,
+            'buffer': list(self._buffer)
+        }
+
+    def set_state(self, state):
+        self.generator.bit_generator.state = state['generator']
+        self._buffer = list(state['buffer'])
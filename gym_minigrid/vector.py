@@ -0,0 +1,534 @@
+import weakref
+import numpy as np
+
+from .minigrid import OBJECT_TO_IDX, STATE_TO_IDX, DIR_TO_VEC, MiniGridEnv, Wall
+from .visibility import compute_vis_masks
+
+# Encodings of cells which are not backed by an object
+EMPTY = np.array([OBJECT_TO_IDX['empty'], 0, 0], dtype='uint8')
+WALL = np.array(Wall().encode(), dtype='uint8')
+
+# Lookup tables of the object types the agent can walk over (doors only
+# when open) and of the object types it can pick up
+CAN_OVERLAP = np.zeros(256, dtype=bool)
+CAN_OVERLAP[[OBJECT_TO_IDX[t] for t in ('empty', 'floor', 'goal', 'lava')]] = True
+CAN_PICKUP = np.zeros(256, dtype=bool)
+CAN_PICKUP[[OBJECT_TO_IDX[t] for t in ('key', 'ball', 'box')]] = True
+
+class VecMiniGrid:
+    """
+    Batch of MiniGrid environments stepped with array operations
+
+    The state of all the environments (grids, agent position and direction,
+    carried object and step count) is held in stacked arrays, and `step`
+    applies the rules of MiniGridEnv.step to all of them at once: turning,
+    moving forward, picking up, dropping and toggling objects, terminating
+    on goal and lava cells and after max_steps. Environments which are done
+    are reset automatically, and the observation returned for them is the
+    first one of the new episode.
+
+    The environment instances are only used to generate new levels when
+    resetting. Environments overriding `step` or `_reward` (e.g. Fetch,
+    KeyCorridor or DynamicObstacles) can not be reproduced and raise a
+    ValueError, use SubprocVecMiniGrid for them. All environments must
+    have the same grid size and agent view size.
+    """
+
+    def __init__(self, env_fns):
+        self.envs = [env_fn().unwrapped for env_fn in env_fns]
+        self.num_envs = len(self.envs)
+        assert self.num_envs > 0
+
+        for env in self.envs:
+            if type(env).step is not MiniGridEnv.step or type(env)._reward is not MiniGridEnv._reward:
+                raise ValueError(
+                    "{} overrides step or _reward, which VecMiniGrid does not "
+                    "reproduce, use SubprocVecMiniGrid instead".format(type(env).__name__)
+                )
+
+        env = self.envs[0]
+        for other in self.envs:
+            assert (other.width, other.height) == (env.width, env.height), \
+                "all environments must have the same grid size"
+            assert other.agent_view_size == env.agent_view_size, \
+                "all environments must have the same agent view size"
+            assert other.max_mission_tokens == env.max_mission_tokens, \
+                "all environments must have the same mission token length"
+
+        self.width = env.width
+        self.height = env.height
+        self.agent_view_size = env.agent_view_size
+        self.actions = MiniGridEnv.Actions
+        self.num_actions = len(self.actions)
+
+        # Spaces of a single environment
+        self.action_space = env.action_space
+        self.observation_space = env.observation_space
+
+        n = self.num_envs
+        self.grids = np.zeros((n, self.width, self.height, 3), dtype='uint8')
+        self.agent_pos = np.zeros((n, 2), dtype=np.int64)
+        self.agent_dir = np.zeros(n, dtype=np.int64)
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self.max_steps = np.array([e.max_steps for e in self.envs], dtype=np.int64)
+        self.see_through_walls = np.array([e.see_through_walls for e in self.envs])
+        self.missions = [None] * n
+
+        # Mission tokens, when the environments generate them
+        self.max_mission_tokens = env.max_mission_tokens
+        if self.max_mission_tokens is not None:
+            self.mission_tokens = np.zeros((n, self.max_mission_tokens), dtype=np.uint16)
+
+        # Encoding of the carried objects, all zeros when not carrying
+        self.carrying = np.zeros((n, 3), dtype='uint8')
+
+        # Box contents are not part of the encoding. They are kept per
+        # environment, keyed by box position, and for the carried box.
+        self.box_contents = [{} for _ in range(n)]
+        self.carried_contents = [None] * n
+
+        # Offsets from the agent position to the cells of its view,
+        # indexed by agent direction
+        offsets = [MiniGridEnv.view_offsets(self.agent_view_size, d) for d in range(4)]
+        self.view_offsets_x = np.stack([off_x for off_x, _ in offsets])
+        self.view_offsets_y = np.stack([off_y for _, off_y in offsets])
+
+        self.dir_vecs = np.array(DIR_TO_VEC)
+
+    def seed(self, seed=None):
+        """
+        Seed the environments with consecutive seeds, or a list of seeds
+        """
+
+        if seed is None or isinstance(seed, int):
+            seeds = [seed if seed is None else seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+        assert len(seeds) == self.num_envs
+
+        return [env.seed(s) for env, s in zip(self.envs, seeds)]
+
+    def reset(self):
+        for i in range(self.num_envs):
+            self._reset_env(i)
+
+        return self.gen_obs()
+
+    def _reset_env(self, i):
+        """
+        Generate a new level for one environment and load it into the batch
+        """
+
+        env = self.envs[i]
+        env.reset()
+
+        self.grids[i] = env.grid.array
+        self.agent_pos[i] = env.agent_pos
+        self.agent_dir[i] = env.agent_dir
+        self.step_count[i] = 0
+        self.max_steps[i] = env.max_steps
+        self.missions[i] = env.mission
+        if self.max_mission_tokens is not None:
+            self.mission_tokens[i] = env.mission_tokens
+        self.carrying[i] = 0
+
+        self.box_contents[i] = {}
+        self.carried_contents[i] = None
+        for x, y in np.argwhere(env.grid.array[:, :, 0] == OBJECT_TO_IDX['box']):
+            contents = env.grid.get(x, y).contains
+            if contents is not None:
+                self.box_contents[i][(int(x), int(y))] = contents.encode()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,)
+        assert ((actions >= 0) & (actions < self.num_actions)).all(), "unknown action"
+
+        idx = np.arange(self.num_envs)
+        self.step_count += 1
+
+        reward = np.zeros(self.num_envs)
+        done = np.zeros(self.num_envs, dtype=bool)
+
+        # Get the position in front of the agents and its contents
+        fwd_pos = self.agent_pos + self.dir_vecs[self.agent_dir]
+        fwd_x, fwd_y = fwd_pos[:, 0], fwd_pos[:, 1]
+        fwd_cell = self.grids[idx, fwd_x, fwd_y]
+        fwd_type = fwd_cell[:, 0]
+        fwd_state = fwd_cell[:, 2]
+
+        # Rotate left or right
+        turn = (actions == self.actions.right).astype(np.int64) - (actions == self.actions.left)
+        self.agent_dir = (self.agent_dir + turn) % 4
+
+        # Move forward
+        forward = actions == self.actions.forward
+        can_overlap = CAN_OVERLAP[fwd_type] | (
+            (fwd_type == OBJECT_TO_IDX['door']) & (fwd_state == STATE_TO_IDX['open'])
+        )
+        move = forward & can_overlap
+        self.agent_pos[move] = fwd_pos[move]
+
+        goal = forward & (fwd_type == OBJECT_TO_IDX['goal'])
+        reward[goal] = 1 - 0.9 * (self.step_count[goal] / self.max_steps[goal])
+        done |= goal
+        done |= forward & (fwd_type == OBJECT_TO_IDX['lava'])
+
+        # Pick up an object
+        pickup = (actions == self.actions.pickup) & CAN_PICKUP[fwd_type] & (self.carrying[:, 0] == 0)
+        self.carrying[pickup] = fwd_cell[pickup]
+        self.grids[idx[pickup], fwd_x[pickup], fwd_y[pickup]] = EMPTY
+        for i in np.flatnonzero(pickup & (fwd_type == OBJECT_TO_IDX['box'])):
+            self.carried_contents[i] = self.box_contents[i].pop((fwd_x[i], fwd_y[i]), None)
+
+        # Drop an object
+        drop = (actions == self.actions.drop) & (fwd_type == OBJECT_TO_IDX['empty']) & (self.carrying[:, 0] != 0)
+        self.grids[idx[drop], fwd_x[drop], fwd_y[drop]] = self.carrying[drop]
+        for i in np.flatnonzero(drop & (self.carrying[:, 0] == OBJECT_TO_IDX['box'])):
+            if self.carried_contents[i] is not None:
+                self.box_contents[i][(fwd_x[i], fwd_y[i])] = self.carried_contents[i]
+            self.carried_contents[i] = None
+        self.carrying[drop] = 0
+
+        # Toggle doors, locked doors need a key of the same color
+        toggle = actions == self.actions.toggle
+        door = toggle & (fwd_type == OBJECT_TO_IDX['door'])
+        locked = fwd_state == STATE_TO_IDX['locked']
+        unlock = door & locked & \
+            (self.carrying[:, 0] == OBJECT_TO_IDX['key']) & (self.carrying[:, 1] == fwd_cell[:, 1])
+        flip = door & ~locked
+        new_state = np.where(
+            unlock | (fwd_state == STATE_TO_IDX['closed']),
+            STATE_TO_IDX['open'],
+            STATE_TO_IDX['closed']
+        )
+        change = unlock | flip
+        self.grids[idx[change], fwd_x[change], fwd_y[change], 2] = new_state[change]
+
+        # Toggling a box replaces it by its contents
+        for i in np.flatnonzero(toggle & (fwd_type == OBJECT_TO_IDX['box'])):
+            contents = self.box_contents[i].pop((fwd_x[i], fwd_y[i]), None)
+            self.grids[i, fwd_x[i], fwd_y[i]] = EMPTY if contents is None else contents
+
+        done |= self.step_count >= self.max_steps
+
+        for i in np.flatnonzero(done):
+            self._reset_env(i)
+
+        obs = self.gen_obs()
+
+        return obs, reward, done, [{} for _ in range(self.num_envs)]
+
+    def gen_obs(self):
+        """
+        Generate the agent views of all environments, as MiniGridEnv.gen_obs
+        """
+
+        n = self.num_envs
+        sz = self.agent_view_size
+
+        # Gather the views, cells outside of the grid are seen as walls
+        xs = self.agent_pos[:, 0, np.newaxis, np.newaxis] + self.view_offsets_x[self.agent_dir]
+        ys = self.agent_pos[:, 1, np.newaxis, np.newaxis] + self.view_offsets_y[self.agent_dir]
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        image = self.grids[
+            np.arange(n)[:, np.newaxis, np.newaxis],
+            np.where(inside, xs, 0),
+            np.where(inside, ys, 0)
+        ]
+        image[~inside] = WALL
+
+        # Process occluders and visibility
+        if not self.see_through_walls.all():
+            types = image[:, :, :, 0]
+            opaque = (types == OBJECT_TO_IDX['wall']) | (
+                (types == OBJECT_TO_IDX['door']) &
+                (image[:, :, :, 2] != STATE_TO_IDX['open'])
+            )
+            vis_mask = compute_vis_masks(~opaque, (sz // 2, sz - 1))
+            vis_mask[self.see_through_walls] = True
+            image *= vis_mask[:, :, :, np.newaxis]
+
+        # The agents see what they are carrying
+        carrying = self.carrying[:, 0] != 0
+        image[:, sz // 2, sz - 1] = np.where(carrying[:, np.newaxis], self.carrying, EMPTY)
+
+        obs = {
+            'image': image,
+            'direction': self.agent_dir.copy(),
+            'mission': list(self.missions)
+        }
+
+        if self.max_mission_tokens is not None:
+            obs['mission_tokens'] = self.mission_tokens.copy()
+
+        return obs
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+def _subproc_worker(conn, env_fns, start, buffer_specs):
+    """
+    Worker process of SubprocVecMiniGrid, stepping a slice of the
+    environments and writing their results into the shared buffers
+    """
+
+    from multiprocessing import shared_memory
+
+    envs = [env_fn() for env_fn in env_fns]
+
+    blocks = []
+    buffers = {}
+    for key, (name, shape, dtype) in buffer_specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        buffers[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def write_obs(i, obs):
+        buffers['image'][i] = obs['image']
+        buffers['direction'][i] = obs['direction']
+
+    try:
+        while True:
+            cmd, data = conn.recv()
+
+            if cmd == 'step':
+                # Missions are only sent back when they may have changed
+                missions = {}
+                for k, env in enumerate(envs):
+                    i = start + k
+                    obs, reward, done, _ = env.step(buffers['action'][i])
+                    if done:
+                        obs = env.reset()
+                        missions[i] = obs['mission']
+                    write_obs(i, obs)
+                    buffers['reward'][i] = reward
+                    buffers['done'][i] = done
+                conn.send(missions)
+
+            elif cmd == 'reset':
+                missions = {}
+                for k, env in enumerate(envs):
+                    obs = env.reset()
+                    write_obs(start + k, obs)
+                    missions[start + k] = obs['mission']
+                conn.send(missions)
+
+            elif cmd == 'seed':
+                conn.send([env.seed(s) for env, s in zip(envs, data)])
+
+            elif cmd == 'close':
+                for env in envs:
+                    env.close()
+                conn.send(None)
+                break
+
+            else:
+                assert False, "unknown command '%s'" % cmd
+
+    except EOFError:
+        # The pipe was closed without a close command
+        pass
+    finally:
+        buffers.clear()
+        for block in blocks:
+            block.close()
+        conn.close()
+
+class SubprocVecMiniGrid:
+    """
+    Batch of MiniGrid environments stepped in worker processes
+
+    This is meant for environments which VecMiniGrid can not reproduce,
+    such as environments overriding `step` or `_gen_grid` with custom logic.
+    Each worker hosts several environments and writes their image and
+    direction observations, rewards and done flags directly into shared
+    memory, so that only short commands go through the pipes. Environments
+    are reset automatically at the end of an episode.
+
+    The arrays returned by `reset` and `step` are views of the shared
+    buffers, and are overwritten by the next call. Copy them to keep them.
+    Closing the batch, or letting it be garbage collected, stops the
+    workers and frees the shared memory once these arrays are released.
+
+    With a start method other than 'fork', env_fns must be picklable
+    (e.g. functools.partial(gym.make, env_id)).
+    """
+
+    def __init__(self, env_fns, num_workers=None, context=None):
+        import multiprocessing as mp
+
+        env_fns = list(env_fns)
+        self.num_envs = len(env_fns)
+        assert self.num_envs > 0
+
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        num_workers = max(1, min(num_workers, self.num_envs))
+
+        # Get the spaces from a probe environment
+        env = env_fns[0]()
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+        img_shape = env.observation_space.spaces['image'].shape
+        env.close()
+
+        # Released by close, or by _release if the setup fails
+        self.blocks = []
+        self.buffers = {}
+        self.conns = []
+        self.procs = []
+        self.closed = True
+
+        try:
+            self._start(env_fns, img_shape, num_workers, context)
+        except BaseException:
+            self._release()
+            raise
+
+        self.waiting = False
+        self.closed = False
+
+    def _start(self, env_fns, img_shape, num_workers, context):
+        """
+        Create the shared buffers and start the worker processes
+        """
+
+        import multiprocessing as mp
+        from multiprocessing import shared_memory
+
+        n = self.num_envs
+        buffer_shapes = {
+            'image': ((n,) + img_shape, np.uint8),
+            'direction': ((n,), np.int64),
+            'reward': ((n,), np.float64),
+            'done': ((n,), np.bool_),
+            'action': ((n,), np.int64),
+        }
+
+        buffer_specs = {}
+        for key, (shape, dtype) in buffer_shapes.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            block = shared_memory.SharedMemory(create=True, size=size)
+            self.blocks.append(block)
+            self.buffers[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+            # Keep the block mapped as long as the array or views of it
+            # exist, these can outlive the batch
+            weakref.finalize(self.buffers[key], block.close)
+            buffer_specs[key] = (block.name, shape, dtype)
+
+        self.missions = [None] * n
+
+        # Split the environments between the workers
+        ctx = mp.get_context(context)
+        bounds = np.linspace(0, n, num_workers + 1).astype(int)
+        self.bounds = bounds
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_subproc_worker,
+                args=(child_conn, env_fns[start:end], int(start), buffer_specs),
+                daemon=True
+            )
+            self.conns.append(conn)
+            proc.start()
+            child_conn.close()
+            self.procs.append(proc)
+
+    def _gen_obs(self):
+        return {
+            'image': self.buffers['image'],
+            'direction': self.buffers['direction'],
+            'mission': list(self.missions)
+        }
+
+    def _collect_missions(self):
+        for conn in self.conns:
+            for i, mission in conn.recv().items():
+                self.missions[i] = mission
+
+    def seed(self, seed=None):
+        """
+        Seed the environments with consecutive seeds, or a list of seeds
+        """
+
+        if seed is None or isinstance(seed, int):
+            seeds = [seed if seed is None else seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+        assert len(seeds) == self.num_envs
+
+        for conn, start, end in zip(self.conns, self.bounds[:-1], self.bounds[1:]):
+            conn.send(('seed', seeds[start:end]))
+
+        return sum((conn.recv() for conn in self.conns), [])
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send(('reset', None))
+        self._collect_missions()
+
+        return self._gen_obs()
+
+    def step_async(self, actions):
+        assert not self.waiting
+        self.buffers['action'][:] = actions
+        for conn in self.conns:
+            conn.send(('step', None))
+        self.waiting = True
+
+    def step_wait(self):
+        assert self.waiting
+        self._collect_missions()
+        self.waiting = False
+
+        infos = [{} for _ in range(self.num_envs)]
+        return self._gen_obs(), self.buffers['reward'], self.buffers['done'], infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+
+        try:
+            if self.waiting:
+                self.step_wait()
+            for conn in self.conns:
+                conn.send(('close', None))
+            for conn in self.conns:
+                conn.recv()
+        except (BrokenPipeError, EOFError):
+            # A worker already exited, _release terminates the others
+            pass
+        finally:
+            self._release()
+
+    def _release(self):
+        """
+        Stop the worker processes and free the shared memory
+        """
+
+        for conn in self.conns:
+            conn.close()
+        for proc in self.procs:
+            # Workers exit when their pipe is closed
+            proc.join(timeout=1)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+
+        # The blocks are unmapped once their arrays are garbage collected
+        self.buffers.clear()
+        for block in self.blocks:
+            block.unlink()
+        self.blocks = []
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
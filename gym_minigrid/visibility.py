@@ -0,0 +1,119 @@
+import numpy as np
+
+# Views up to this width use precomputed per-row lookup tables,
+# wider views propagate visibility with array operations
+LOOKUP_MAX_WIDTH = 7
+
+# Lookup tables indexed by view width, see lookup_tables
+_tables = {}
+
+def propagate_rows(mask, transparent):
+    """
+    Propagate visibility along rows of cells. This is equivalent to the
+    left-to-right then right-to-left sweeps of the occlusion algorithm,
+    applied to any number of rows at once.
+
+    :param mask: (..., width) bool array, initially visible cells
+    :param transparent: (..., width) bool array, cells which can be seen through
+    :return: the visible cells of each row, and the cells of the row
+        above which are made visible by them
+    """
+
+    width = mask.shape[-1]
+    idx = np.arange(width)
+
+    # Left to right, a cell is visible if the closest visible cell on its
+    # left is not hidden from it by an opaque cell
+    last_vis = np.maximum.accumulate(np.where(mask, idx, -1), axis=-1)
+    last_opaque = np.maximum.accumulate(np.where(transparent, -1, idx), axis=-1)
+    left = mask.copy()
+    left[..., 1:] |= last_vis[..., :-1] > last_opaque[..., :-1]
+
+    # Right to left, starting from the cells visible after the first sweep
+    first_vis = np.minimum.accumulate(np.where(left, idx, width)[..., ::-1], axis=-1)[..., ::-1]
+    first_opaque = np.minimum.accumulate(np.where(transparent, width, idx)[..., ::-1], axis=-1)[..., ::-1]
+    final = left.copy()
+    final[..., :-1] |= first_vis[..., 1:] < first_opaque[..., 1:]
+
+    # Visible transparent cells reveal the cells above them, and the
+    # cells diagonally above in the direction of the sweep
+    left_src = left & transparent
+    left_src[..., -1] = False
+    right_src = final & transparent
+    right_src[..., 0] = False
+    above = left_src | right_src
+    above[..., 1:] |= left_src[..., :-1]
+    above[..., :-1] |= right_src[..., 1:]
+
+    return final, above
+
+def lookup_tables(width):
+    """
+    Get the results of propagate_rows for every row of a given width,
+    indexed by the bit patterns of the visible and transparent cells
+    """
+
+    if width in _tables:
+        return _tables[width]
+
+    n = 1 << width
+    bits = ((np.arange(n)[:, np.newaxis] >> np.arange(width)) & 1).astype(bool)
+    mask = np.broadcast_to(bits[:, np.newaxis, :], (n, n, width))
+    transparent = np.broadcast_to(bits[np.newaxis, :, :], (n, n, width))
+
+    final, above = propagate_rows(mask, transparent)
+
+    weights = 1 << np.arange(width)
+    tables = ((final @ weights).tolist(), (above @ weights).tolist())
+
+    _tables[width] = tables
+    return tables
+
+def compute_vis_mask(transparent, agent_pos):
+    """
+    Compute which cells of a view are visible from the agent position
+
+    :param transparent: (width, height) bool array, cells which can be seen through
+    :param agent_pos: position of the agent in the view
+    :return: (width, height) bool visibility mask
+    """
+
+    width, height = transparent.shape
+    ax, ay = agent_pos
+
+    if width <= LOOKUP_MAX_WIDTH:
+        final_table, above_table = lookup_tables(width)
+
+        weights = 1 << np.arange(width)
+        rows = (weights @ transparent).tolist()
+
+        vis_rows = [0] * height
+        row = 1 << ax
+        for j in range(ay, -1, -1):
+            vis_rows[j] = final_table[row][rows[j]]
+            row = above_table[row][rows[j]]
+
+        return ((np.array(vis_rows) >> np.arange(width)[:, np.newaxis]) & 1).astype(bool)
+
+    return compute_vis_masks(transparent[np.newaxis], agent_pos)[0]
+
+def compute_vis_masks(transparent, agent_pos):
+    """
+    Compute the visibility masks of a batch of views, the agent being at
+    the same position in all of them
+
+    :param transparent: (n, width, height) bool array, cells which can be seen through
+    :param agent_pos: position of the agent in the views
+    :return: (n, width, height) bool visibility masks
+    """
+
+    n, width, height = transparent.shape
+    ax, ay = agent_pos
+
+    mask = np.zeros(shape=(n, width, height), dtype=bool)
+    row = np.zeros(shape=(n, width), dtype=bool)
+    row[:, ax] = True
+    for j in range(ay, -1, -1):
+        mask[:, :, j], row = propagate_rows(row, transparent[:, :, j])
+
+    return mask
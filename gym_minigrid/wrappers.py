@@ -1,13 +1,29 @@
 import math
 import operator
+from collections import OrderedDict
 from functools import reduce
 
 import numpy as np
 import gym
 from gym import error, spaces, utils
 from .minigrid import OBJECT_TO_IDX, COLOR_TO_IDX, STATE_TO_IDX, IDX_TO_OBJECT, IDX_TO_COLOR, IDX_TO_STATE,DIR_TO_VEC
-import nengo_spa as spa
-import nengo_ssp as ssp
+
+# The SSP dependencies are slow to import, so they are only imported when
+# an SSP wrapper or space is first created, see _import_ssp
+_spa = None
+_ssp = None
+
+def _import_ssp():
+    """
+    Import nengo_spa and nengo_ssp as the _spa and _ssp module globals
+    """
+
+    global _spa, _ssp
+    if _ssp is None:
+        import nengo_spa
+        import nengo_ssp
+        _spa = nengo_spa
+        _ssp = nengo_ssp
 
 class ReseedWrapper(gym.core.Wrapper):
     """
@@ -100,6 +116,25 @@ class StateBonus(gym.core.Wrapper):
     def reset(self, **kwargs):
         return self.env.reset(**kwargs)
 
+def _obs_buffer(out, space):
+    """
+    Output buffer of an observation wrapper, from its `out` argument:
+    None to return a new array for every observation, True to write every
+    observation into a buffer allocated once, or an array of the shape of
+    the observation space (e.g. a slice of a rollout storage) to write
+    them into. The buffer is the `out` attribute of the wrapper, and can
+    be reassigned between steps. Observations written into a buffer are
+    overwritten by the next ones, copy them to keep them.
+    """
+
+    if out is True:
+        return np.zeros(space.shape, dtype=space.dtype)
+
+    if out is not None:
+        assert out.shape == space.shape, 'out must have shape {}'.format(space.shape)
+
+    return out
+
 class ImgObsWrapper(gym.core.ObservationWrapper):
     """
     Use the image as the only observation output, no language/mission.
@@ -118,10 +153,11 @@ class OneHotPartialObsWrapper(gym.core.ObservationWrapper):
     agent view as observation.
     """
 
-    def __init__(self, env, tile_size=8):
+    def __init__(self, env, tile_size=8, dtype='uint8', out=None):
         super().__init__(env)
 
         self.tile_size = tile_size
+        self.dtype = np.dtype(dtype)
 
         obs_shape = env.observation_space['image'].shape
 
@@ -130,24 +166,30 @@ class OneHotPartialObsWrapper(gym.core.ObservationWrapper):
 
         self.observation_space.spaces["image"] = spaces.Box(
             low=0,
-            high=255,
+            high=255 if self.dtype == np.uint8 else 1,
             shape=(obs_shape[0], obs_shape[1], num_bits),
-            dtype='uint8'
+            dtype=self.dtype
         )
 
+        # Index in the flattened output of the first bit of the type, color
+        # and state of every cell, the bit to set is this index plus the value
+        channel_offsets = np.array([0, len(OBJECT_TO_IDX), len(OBJECT_TO_IDX) + len(COLOR_TO_IDX)])
+        cell_offsets = np.arange(obs_shape[0] * obs_shape[1]) * num_bits
+        self.bit_offsets = (cell_offsets[:, None] + channel_offsets).reshape(obs_shape)
+
+        self.out = _obs_buffer(out, self.observation_space.spaces['image'])
+
     def observation(self, obs):
         img = obs['image']
-        out = np.zeros(self.observation_space.spaces['image'].shape, dtype='uint8')
 
-        for i in range(img.shape[0]):
-            for j in range(img.shape[1]):
-                type = img[i, j, 0]
-                color = img[i, j, 1]
-                state = img[i, j, 2]
+        out = self.out
+        if out is None:
+            out = np.zeros(self.observation_space.spaces['image'].shape, dtype=self.dtype)
+        else:
+            out.fill(0)
 
-                out[i, j, type] = 1
-                out[i, j, len(OBJECT_TO_IDX) + color] = 1
-                out[i, j, len(OBJECT_TO_IDX) + len(COLOR_TO_IDX) + state] = 1
+        # The flat iterator also indexes non-contiguous buffers
+        out.flat[self.bit_offsets + img] = 1
 
         return {
             'mission': obs['mission'],
@@ -161,7 +203,7 @@ class RGBImgObsWrapper(gym.core.ObservationWrapper):
     gridworld in pixel space.
     """
 
-    def __init__(self, env, tile_size=8):
+    def __init__(self, env, tile_size=8, out=None):
         super().__init__(env)
 
         self.tile_size = tile_size
@@ -169,17 +211,20 @@ class RGBImgObsWrapper(gym.core.ObservationWrapper):
         self.observation_space.spaces['image'] = spaces.Box(
             low=0,
             high=255,
-            shape=(self.env.width * tile_size, self.env.height * tile_size, 3),
+            shape=(self.env.height * tile_size, self.env.width * tile_size, 3),
             dtype='uint8'
         )
 
+        self.out = _obs_buffer(out, self.observation_space.spaces['image'])
+
     def observation(self, obs):
         env = self.unwrapped
 
         rgb_img = env.render(
             mode='rgb_array',
             highlight=False,
-            tile_size=self.tile_size
+            tile_size=self.tile_size,
+            out=self.out
         )
 
         return {
@@ -194,7 +239,7 @@ class RGBImgPartialObsWrapper(gym.core.ObservationWrapper):
     This can be used to have the agent to solve the gridworld in pixel space.
     """
 
-    def __init__(self, env, tile_size=8):
+    def __init__(self, env, tile_size=8, out=None):
         super().__init__(env)
 
         self.tile_size = tile_size
@@ -207,12 +252,15 @@ class RGBImgPartialObsWrapper(gym.core.ObservationWrapper):
             dtype='uint8'
         )
 
+        self.out = _obs_buffer(out, self.observation_space.spaces['image'])
+
     def observation(self, obs):
         env = self.unwrapped
 
         rgb_img_partial = env.get_obs_render(
             obs['image'],
-            tile_size=self.tile_size
+            tile_size=self.tile_size,
+            out=self.out
         )
 
         return {
@@ -225,7 +273,7 @@ class FullyObsWrapper(gym.core.ObservationWrapper):
     Fully observable gridworld using a compact grid encoding
     """
 
-    def __init__(self, env):
+    def __init__(self, env, out=None):
         super().__init__(env)
 
         self.observation_space.spaces["image"] = spaces.Box(
@@ -235,34 +283,101 @@ class FullyObsWrapper(gym.core.ObservationWrapper):
             dtype='uint8'
         )
 
+        self.out = _obs_buffer(out, self.observation_space.spaces['image'])
+
     def observation(self, obs):
         env = self.unwrapped
-        full_grid = env.grid.encode()
-        full_grid[env.agent_pos[0]][env.agent_pos[1]] = np.array([
+        full_grid = env.grid.encode(out=self.out)
+        full_grid[env.agent_pos[0], env.agent_pos[1]] = (
             OBJECT_TO_IDX['agent'],
             COLOR_TO_IDX['red'],
             env.agent_dir
-        ])
+        )
 
         return {
             'mission': obs['mission'],
             'image': full_grid
         }
 
+class MissionCache:
+    """
+    Cache of one-hot mission string encodings, shared by all
+    FlatObsWrapper instances of a process. At most `capacity` encodings
+    are kept, the least recently used one being evicted first.
+
+    Letters are encoded by their index in the alphabet and spaces by 26.
+    Other characters (e.g. punctuation) have no bit set.
+    """
+
+    num_char_codes = 27
+
+    # Code of every byte value, -1 for characters which are not encoded
+    char_codes = np.full(256, -1, dtype=np.int64)
+    char_codes[np.frombuffer(b'abcdefghijklmnopqrstuvwxyz', dtype=np.uint8)] = np.arange(26)
+    char_codes[np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', dtype=np.uint8)] = np.arange(26)
+    char_codes[ord(' ')] = 26
+
+    def __init__(self, capacity=1024):
+        assert capacity >= 1
+        self.capacity = capacity
+
+        # Read-only flat encodings, by (mission, max_len)
+        self.encodings = OrderedDict()
+
+    def __len__(self):
+        return len(self.encodings)
+
+    def clear(self):
+        self.encodings.clear()
+
+    def encode(self, mission, max_len):
+        """
+        Get the flat (max_len * num_char_codes,) uint8 encoding of a mission
+        """
+
+        if not isinstance(mission, str):
+            raise TypeError('only string missions can be encoded, not {}'.format(type(mission).__name__))
+
+        key = (mission, max_len)
+        if key in self.encodings:
+            self.encodings.move_to_end(key)
+            return self.encodings[key]
+
+        assert len(mission) <= max_len, 'mission string too long ({} chars)'.format(len(mission))
+
+        # One byte per character, characters outside of latin-1 become '?'
+        chars = np.frombuffer(mission.encode('latin-1', errors='replace'), dtype=np.uint8)
+        codes = self.char_codes[chars]
+        positions = np.flatnonzero(codes >= 0)
+
+        encoding = np.zeros(max_len * self.num_char_codes, dtype=np.uint8)
+        encoding[positions * self.num_char_codes + codes[positions]] = 1
+        encoding.setflags(write=False)
+
+        self.encodings[key] = encoding
+        while len(self.encodings) > self.capacity:
+            self.encodings.popitem(last=False)
+
+        return encoding
+
 class FlatObsWrapper(gym.core.ObservationWrapper):
     """
     Encode mission strings using a one-hot scheme,
     and combine these with observed images into one flat array
     """
 
-    def __init__(self, env, maxStrLen=96):
+    # Mission encodings, shared by all instances
+    mission_cache = MissionCache()
+
+    def __init__(self, env, maxStrLen=96, out=None):
         super().__init__(env)
 
         self.maxStrLen = maxStrLen
-        self.numCharCodes = 27
+        self.numCharCodes = MissionCache.num_char_codes
 
         imgSpace = env.observation_space.spaces['image']
         imgSize = reduce(operator.mul, imgSpace.shape, 1)
+        self.imgSize = imgSize
 
         self.observation_space = spaces.Box(
             low=0,
@@ -271,34 +386,20 @@ class FlatObsWrapper(gym.core.ObservationWrapper):
             dtype='uint8'
         )
 
-        self.cachedStr = None
-        self.cachedArray = None
+        self.out = _obs_buffer(out, self.observation_space)
 
     def observation(self, obs):
         image = obs['image']
-        mission = obs['mission']
+        encoding = self.mission_cache.encode(obs['mission'], self.maxStrLen)
 
-        # Cache the last-encoded mission string
-        if mission != self.cachedStr:
-            assert len(mission) <= self.maxStrLen, 'mission string too long ({} chars)'.format(len(mission))
-            mission = mission.lower()
+        out = self.out
+        if out is None:
+            out = np.empty(self.observation_space.shape, dtype='uint8')
 
-            strArray = np.zeros(shape=(self.maxStrLen, self.numCharCodes), dtype='float32')
+        out[:self.imgSize] = image.reshape(-1)
+        out[self.imgSize:] = encoding
 
-            for idx, ch in enumerate(mission):
-                if ch >= 'a' and ch <= 'z':
-                    chNo = ord(ch) - ord('a')
-                elif ch == ' ':
-                    chNo = ord('z') - ord('a') + 1
-                assert chNo < self.numCharCodes, '%s : %d' % (ch, chNo)
-                strArray[idx, chNo] = 1
-
-            self.cachedStr = mission
-            self.cachedArray = strArray
-
-        obs = np.concatenate((image.flatten(), self.cachedArray.flatten()))
-
-        return obs
+        return out
 
 class ViewSizeWrapper(gym.core.Wrapper):
     """
@@ -397,25 +498,52 @@ class SSPGoalBonus(gym.core.Wrapper):
         return self.env.reset(**kwargs)
 
 
+# Tables of position SSPs, by basis and grid size, shared by all wrappers.
+# At most POSITION_SSPS_CAPACITY tables are kept, the least recently used
+# one being evicted first.
+POSITION_SSPS_CAPACITY = 16
+_position_ssps = OrderedDict()
+
+def position_ssps(X, Y, width, height):
+    """
+    Get the (width, height, d) table of the real parts of the SSPs
+    X**x * Y**y of all the cells of a grid
+    """
+
+    key = (X.v.tobytes(), Y.v.tobytes(), width, height)
+    if key in _position_ssps:
+        _position_ssps.move_to_end(key)
+        return _position_ssps[key]
+
+    table = np.array([[(X**x * Y**y).v.real for y in range(height)] for x in range(width)])
+    table.setflags(write=False)
+
+    _position_ssps[key] = table
+    while len(_position_ssps) > POSITION_SSPS_CAPACITY:
+        _position_ssps.popitem(last=False)
+
+    return table
+
 class SSPWrapper(gym.core.ObservationWrapper):
 
     def __init__(self, env,d,X=None,Y=None,delta=2,rng=None):
         super().__init__(env)
+        _import_ssp()
         
-        self.alg = spa.algebras.HrrAlgebra()
+        self.alg = _spa.algebras.HrrAlgebra()
 
         img_shape = env.observation_space['image'].shape
         self.img_shape = img_shape
         self.d = d
-        self.X = X or ssp.vector_generation.UnitaryVectors(d)
-        self.Y = Y or ssp.vector_generation.UnitaryVectors(d)
+        self.X = X or _ssp.vector_generation.UnitaryVectors(d)
+        self.Y = Y or _ssp.vector_generation.UnitaryVectors(d)
         
         colors = [x.upper() for x in list(COLOR_TO_IDX.keys())]
         
-        pointer_gen = spa.vector_generation.UnitaryVectors(self.d, self.alg, rng=rng)
+        pointer_gen = _spa.vector_generation.UnitaryVectors(self.d, self.alg, rng=rng)
         objects = [x.upper() for x in list(OBJECT_TO_IDX.keys())]
 
-        vocab = spa.Vocabulary(d, pointer_gen = pointer_gen)
+        vocab = _spa.Vocabulary(d, pointer_gen = pointer_gen)
         vocab.populate(';'.join(colors + objects ))
         vocab.add('NULL', np.zeros(d))
         vocab.add('OPEN',  self.alg.identity_element(d))
@@ -449,8 +577,8 @@ class SSPWrapper(gym.core.ObservationWrapper):
         xi = np.linspace(0,delta,50)
         yi = np.linspace(-(delta//2),delta//2,50)
         xxi,yyi = np.meshgrid(xi,yi)
-        Srecs = ssp.utils.ssp_vectorized(np.vstack([self.X.v, self.Y.v]).T, np.vstack([xxi.reshape(-1), yyi.reshape(-1)]).T)
-        S_rec = ssp.SpatialSemanticPointer(data= np.sum(Srecs, axis=1))
+        Srecs = _ssp.utils.ssp_vectorized(np.vstack([self.X.v, self.Y.v]).T, np.vstack([xxi.reshape(-1), yyi.reshape(-1)]).T)
+        S_rec = _ssp.SpatialSemanticPointer(data= np.sum(Srecs, axis=1))
         S_rec= S_rec.normalized()
         self.S_rec = S_rec
 
@@ -461,66 +589,81 @@ class SSPWrapper(gym.core.ObservationWrapper):
         xx,yy = np.meshgrid(xi,yi)
         basisv = np.vstack([self.X.v, self.Y.v]).T
         positions = np.vstack([xx.reshape(-1), yy.reshape(-1)]).T
-        S_ids = ssp.utils.ssp_vectorized(basisv, positions).T.real
+        S_ids = _ssp.utils.ssp_vectorized(basisv, positions).T.real
         S_list_rec = np.zeros(S_ids.shape)
         for i in np.arange(S_ids.shape[0]):
-            S_list_rec[i,:] = (S_rec * ssp.SpatialSemanticPointer(data=S_ids[i,:])).normalized().v.real
+            S_list_rec[i,:] = (S_rec * _ssp.SpatialSemanticPointer(data=S_ids[i,:])).normalized().v.real
         
         self.S_list = S_ids.reshape(len(xi),len(yi),d)
         self.S_list_rec = S_list_rec.reshape(len(xi),len(yi),d)
 
+        # The encoding of a view is the sum over the object types in view
+        # of the normalized sum of the SSPs of their cells, bound to the
+        # pointer of the type. Binding distributes over the sum, so it is
+        # the sum over the cells of the bound (cell, type) vectors, scaled
+        # by the norms of the per type sums. The bound vectors are computed
+        # once in the FFT domain, and the norms from the Gram matrix of the
+        # cell SSPs.
+        cells = self.S_list_rec.reshape(-1, d)
+        types = np.stack([self.vocab[IDX_TO_OBJECT[i].upper()].v for i in range(len(OBJECT_TO_IDX))])
+        self.cell_gram = cells @ cells.T
+        self.bound_cells = np.fft.irfft(
+            np.fft.rfft(types)[:, np.newaxis, :] * np.fft.rfft(cells)[np.newaxis, :, :],
+            n=d
+        )
+
+        # Tiles that are 'unseen', 'empty', or floors are not encoded
+        self.encoded_types = np.ones(256, dtype=bool)
+        self.encoded_types[[OBJECT_TO_IDX['unseen'], OBJECT_TO_IDX['empty'], OBJECT_TO_IDX['floor']]] = False
+
+    def encode(self, img):
+        """
+        Encode a view, or a (..., width, height, 3) stack of views
+        """
+
+        batch_shape = img.shape[:-3]
+        types = img[..., 0].reshape(-1, img.shape[-3] * img.shape[-2]).astype(np.int64)
+        num_types, num_cells, d = self.bound_cells.shape
+        encoded = self.encoded_types[types]
+
+        # Norm of the sum of the cell SSPs of every object type in view
+        masks = (types[:, np.newaxis, :] == np.arange(num_types)[:, np.newaxis]) & encoded[:, np.newaxis, :]
+        masks = masks.astype(np.float64)
+        norms = np.sqrt(((masks @ self.cell_gram) * masks).sum(axis=2))
+        norms = np.take_along_axis(norms, types, axis=1)
+
+        # Sum the bound vectors of the cells, scaled by the norm of their type
+        weights = np.where(encoded, 1 / np.where(norms > 0, norms, 1), 0)
+        bound = self.bound_cells[types, np.arange(num_cells)]
+        M = np.einsum('bc,bcd->bd', weights, bound)
+
+        return M.reshape(batch_shape + (d,))
+
     def observation(self, obs):
-        img = obs['image']
-        
-        # M = spa.SemanticPointer(data=np.zeros(self.d))
-        # for i in range(img.shape[0]):
-        #     for j in range(img.shape[1]):
-        #         obj = img[i, j, 0]
-        #         color = img[i, j, 1]
-        #         state = img[i, j, 2]
-        #         if obj not in [0,1]:                    
-        #             #S = spa.SemanticPointer(data=self.S_list[i,j,:])
-        #             S = spa.SemanticPointer(data=self.S_list_rec[i,j,:])
-        #             M = M + ( S * self.vocab[IDX_TO_OBJECT[obj].upper()] * self.vocab[IDX_TO_COLOR[color].upper()] * self.vocab[IDX_TO_STATE[state].upper()])
-       
-        M = spa.SemanticPointer(data=np.zeros(self.d))
-        allobjs = np.unique(img[:,:,0])
-        # It doesn't save info about tiles that are 'unseen', 'emtpy', or floors
-        allobjs = np.delete(allobjs,np.where((allobjs== 0) | (allobjs ==1) | (allobjs ==3)))
-        for i in allobjs:
-            obj = i
-            idxs = np.where(img[:,:,0]==i)
-            
-            S = spa.SemanticPointer(data = np.sum(self.S_list_rec[idxs[0],idxs[1],:],axis=0))
-            S = S.normalized()
-            M = M + ( S * self.vocab[IDX_TO_OBJECT[obj].upper()])
-        #M = M.normalized()
-        
-        #agent_ssp = self.X**(self.delta*self.agent_pos[0]) * self.Y**(self.delta*self.agent_pos[1])
-        #M = M * agent_ssp
         return {
             'mission': obs['mission'],
-            'image': M.v
+            'image': self.encode(obs['image'])
         }
-    
- 
+
+
 class SSPWrapper2(gym.core.ObservationWrapper):
 
     def __init__(self, env,d,X=None,Y=None,delta=2,rng=None):
         super().__init__(env)
+        _import_ssp()
         
-        self.alg = spa.algebras.HrrAlgebra()
+        self.alg = _spa.algebras.HrrAlgebra()
 
         img_shape = env.observation_space['image'].shape
         self.img_shape = img_shape
         self.d = d
-        self.X = X or ssp.vector_generation.UnitaryVectors(d)
-        self.Y = Y or ssp.vector_generation.UnitaryVectors(d)
+        self.X = X or _ssp.vector_generation.UnitaryVectors(d)
+        self.Y = Y or _ssp.vector_generation.UnitaryVectors(d)
         
         
-        pointer_gen = spa.vector_generation.UnitaryVectors(self.d, self.alg, rng=rng)
+        pointer_gen = _spa.vector_generation.UnitaryVectors(self.d, self.alg, rng=rng)
 
-        vocab = spa.Vocabulary(d, pointer_gen = pointer_gen)
+        vocab = _spa.Vocabulary(d, pointer_gen = pointer_gen)
         vocab.populate('POSITION;DIRECTION')
         self.vocab = vocab
             
@@ -532,20 +675,19 @@ class SSPWrapper2(gym.core.ObservationWrapper):
             radius=1,
             shape=(obs_shape[0],)
         )
-        
 
-        
+        # The position and direction pointers bound to the SSPs of every
+        # cell and direction, so that an observation is a lookup and a sum
+        positions = position_ssps(self.X, self.Y, self.unwrapped.width, self.unwrapped.height)
+        directions = np.array([(self.X**dx * self.Y**dy).v.real for dx, dy in DIR_TO_VEC])
+        self.position_codes = np.fft.irfft(np.fft.rfft(self.vocab['POSITION'].v) * np.fft.rfft(positions), n=d)
+        self.direction_codes = np.fft.irfft(np.fft.rfft(self.vocab['DIRECTION'].v) * np.fft.rfft(directions), n=d)
 
     def observation(self, obs):
-        #img = obs['image']
-        
-        agent_ssp = self.X**(self.agent_pos[0]) * self.Y**(self.agent_pos[1])
-        dir_ssp = self.X**(DIR_TO_VEC[self.agent_dir][0]) * self.Y**(DIR_TO_VEC[self.agent_dir][1])
-
-        M = (self.vocab['POSITION'] * agent_ssp) + (self.vocab['DIRECTION'] * dir_ssp)
+        M = self.position_codes[self.agent_pos[0], self.agent_pos[1]] + self.direction_codes[self.agent_dir]
         return {
             'mission': obs['mission'],
-            'image': M.v
+            'image': M
         }
        
 
@@ -557,6 +699,7 @@ class SSPGoalWrapper(SSPWrapper):
     def __init__(self,  env,d,X=None,Y=None,delta=2,rng=None):
         super().__init__(env,d,X,Y,delta,rng)
         self.goal_position = None
+        self.positions = position_ssps(self.X, self.Y, self.unwrapped.width, self.unwrapped.height)
 
     def reset(self):
         obs = self.env.reset()
@@ -567,34 +710,88 @@ class SSPGoalWrapper(SSPWrapper):
         return obs
 
     def observation(self, obs):
-        goal_ssp = self.X**self.goal_position[0] * self.Y**self.goal_position[1]
-        agent_ssp = self.X**self.agent_pos[0] * self.Y**self.agent_pos[1]
-        obs['goal_similarity'] = np.sum(goal_ssp.v.real * agent_ssp.v.real)
+        goal_ssp = self.positions[self.goal_position[0], self.goal_position[1]]
+        agent_ssp = self.positions[self.agent_pos[0], self.agent_pos[1]]
+        obs['goal_similarity'] = np.dot(goal_ssp, agent_ssp)
         return obs
     
 class SSPSpace(gym.spaces.Space):
-    def __init__(self, basis, radius, shape=None, dtype=complex, alg = spa.algebras.HrrAlgebra()):
+    def __init__(self, basis, radius, shape=None, dtype=np.float64, alg=None):
+        _import_ssp()
+        if alg is None:
+            alg = _spa.algebras.HrrAlgebra()
+        super().__init__(basis[0].v.shape, dtype)
         self.nbasis = len(basis)
         self.basis = basis
         self.dim = len(basis[0].v)
-        self.shape = basis[0].v.shape
         self.radius = radius
         self.alg = alg
         self.seed()
-        self.dist = ssp.dists.UniformSSPs(basis,self.alg,self.radius)
 
-    def sample(self):   
-        return self.dist.sample(1)
+        # Log of the Fourier transforms of the basis vectors, so that
+        # a batch of positions is encoded with a single matrix product,
+        # exponential and inverse FFT instead of one FFT per position
+        self.log_basis_fft = np.log(np.fft.fft(np.array([b.v for b in basis]), axis=1))
 
-    
-    def samples(self,n):
-        return self.dist.sample(n)
-              
+    def encode(self, positions):
+        """
+        Encode an (n, nbasis) array of positions into an (n, d)
+        array of real SSP vectors
+        """
+
+        positions = np.asarray(positions, dtype=float)
+        ssps = np.fft.ifft(np.exp(positions @ self.log_basis_fft), axis=-1)
+        return np.ascontiguousarray(ssps.real)
+
+    def sample(self):
+        return self.samples(1)[0]
+
+    def samples(self, n):
+        """
+        Sample n SSPs of positions uniformly distributed in the ball
+        of the given radius, as a contiguous (n, d) array
+        """
+
+        rng = self.np_random
+        directions = rng.standard_normal((n, self.nbasis))
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        radii = rng.uniform(size=(n, 1)) ** (1 / self.nbasis)
+        return self.encode(directions * radii * self.radius)
 
     def contains(self, x):
         """
         Return boolean specifying if x is a valid
-        member of this space
+        member of this space. Arrays of shape (..., d) are checked
+        row by row, and an array of booleans is returned for batches
         """
         # need more to assure its a real SSP - ie on right torus
-        return ((type(x) == spa.SemanticPointer) | (type(x) == ssp.SpatialSemanticPointer) ) & (len(x) == self.dim)
\ No newline at end of file
+        if isinstance(x, (_spa.SemanticPointer, _ssp.SpatialSemanticPointer)):
+            return len(x) == self.dim
+
+        x = np.asarray(x)
+        if x.ndim == 0 or x.shape[-1] != self.dim or not np.issubdtype(x.dtype, np.number):
+            return False
+        valid = np.isfinite(x).all(axis=-1)
+        return bool(valid) if x.ndim == 1 else valid
+
+    def decode(self, x, width, height):
+        """
+        Decode position SSPs into the coordinates of the most similar
+        grid cell, for a space with a 2D basis. A single vector
+        decodes to an (x, y) tuple, and an (..., d) array to an
+        (..., 2) array of coordinates
+        """
+
+        assert self.nbasis == 2, 'decoding requires a 2D basis'
+
+        if isinstance(x, (_spa.SemanticPointer, _ssp.SpatialSemanticPointer)):
+            x = x.v
+        x = np.asarray(x).real
+
+        # Similarity of the vectors with every cell of the grid
+        table = position_ssps(self.basis[0], self.basis[1], width, height)
+        cells = np.argmax(x @ table.reshape(width * height, self.dim).T, axis=-1)
+
+        if x.ndim == 1:
+            return divmod(int(cells), height)
+        return np.stack(np.divmod(cells, height), axis=-1)
\ No newline at end of file
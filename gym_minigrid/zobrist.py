@@ -0,0 +1,82 @@
+import numpy as np
+
+# Zobrist hashing of grid states. Instead of a table of random keys, the
+# key of every (cell, encoding) pair is derived with the SplitMix64 mixing
+# function, so that keys do not depend on the grid size and the hash of a
+# cell can be computed either for a single cell or for a whole grid.
+
+MASK64 = (1 << 64) - 1
+
+# Key domains, so that cell, grid size, agent and carried object keys never overlap
+CELL_DOMAIN = 0
+SIZE_DOMAIN = 1 << 62
+AGENT_DOMAIN = 2 << 62
+CARRYING_DOMAIN = 3 << 62
+
+def mix64(x):
+    """
+    SplitMix64 finalizer of a Python integer
+    """
+
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+def mix64_array(x):
+    """
+    SplitMix64 finalizer of a uint64 array, equivalent to mix64
+    """
+
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def cell_key(i, j, encoding):
+    """
+    Key of a grid cell holding an encoded object. Empty cells have key 0.
+    """
+
+    type_idx, color_idx, state = encoding
+    if type_idx <= 1:
+        return 0
+
+    cell = (int(i) << 40) | (int(j) << 24)
+    return mix64(CELL_DOMAIN | cell | (type_idx << 16) | (color_idx << 8) | state)
+
+def grid_key(array):
+    """
+    Zobrist hash of a (width, height, 3) grid encoding, the XOR of the
+    keys of all its cells and of the key of its size
+    """
+
+    width, height, _ = array.shape
+    i, j = np.meshgrid(np.arange(width, dtype=np.uint64), np.arange(height, dtype=np.uint64), indexing='ij')
+    enc = array.astype(np.uint64)
+
+    x = np.uint64(CELL_DOMAIN) | (i << np.uint64(40)) | (j << np.uint64(24))
+    x |= (enc[:, :, 0] << np.uint64(16)) | (enc[:, :, 1] << np.uint64(8)) | enc[:, :, 2]
+
+    key = mix64(SIZE_DOMAIN | (width << 24) | height)
+
+    keys = mix64_array(x[array[:, :, 0] > 1])
+    if len(keys):
+        key ^= int(np.bitwise_xor.reduce(keys))
+
+    return key
+
+def agent_key(pos, dir, carrying):
+    """
+    Key of the agent pose and of the encoding of the object it carries
+    """
+
+    x, y = pos
+    key = mix64(AGENT_DOMAIN | (int(x) << 24) | (int(y) << 8) | int(dir))
+
+    if carrying is not None:
+        type_idx, color_idx, state = carrying
+        key ^= mix64(CARRYING_DOMAIN | (type_idx << 16) | (color_idx << 8) | state)
+
+    return key
@@ -4,7 +4,7 @@ import random
 import numpy as np
 import gym
 from gym_minigrid.register import env_list
-from gym_minigrid.minigrid import Grid, OBJECT_TO_IDX
+from gym_minigrid.minigrid import Grid, Ball, OBJECT_TO_IDX, STATE_TO_IDX, DIR_TO_VEC, MISSION_VOCAB, tokenize_mission
 
 # Test specifically importing a specific environment
 from gym_minigrid.envs import DoorKeyEnv
@@ -99,10 +99,12 @@ for env_idx, env_name in enumerate(env_list):
     assert obs['image'].mean() > 0
     env.close()
 
+    # Only string missions can be encoded (e.g. not EmptyGoal goal positions)
     env = gym.make(env_name)
-    env = FlatObsWrapper(env)
-    env.reset()
-    env.step(0)
+    if isinstance(env.unwrapped.mission, str):
+        env = FlatObsWrapper(env)
+        env.reset()
+        env.step(0)
     env.close()
 
     env = gym.make(env_name)
@@ -133,6 +135,214 @@ for env_idx, env_name in enumerate(env_list):
 
 ##############################################################################
 
+print('testing visibility and rendering')
+
+import gym_minigrid.minigrid
+
+def sweep_vis_mask(grid, agent_pos):
+    # Reference occlusion sweep, visiting one cell at a time
+    mask = np.zeros(shape=(grid.width, grid.height), dtype=bool)
+    mask[agent_pos[0], agent_pos[1]] = True
+
+    for j in reversed(range(0, grid.height)):
+        for i in range(0, grid.width-1):
+            cell = grid.get(i, j)
+            if not mask[i, j] or (cell and not cell.see_behind()):
+                continue
+            mask[i+1, j] = True
+            if j > 0:
+                mask[i+1, j-1] = True
+                mask[i, j-1] = True
+
+        for i in reversed(range(1, grid.width)):
+            cell = grid.get(i, j)
+            if not mask[i, j] or (cell and not cell.see_behind()):
+                continue
+            mask[i-1, j] = True
+            if j > 0:
+                mask[i-1, j-1] = True
+                mask[i, j-1] = True
+
+    return mask
+
+def fill_coords_per_pixel(img, fn, color):
+    # Reference rasterizer, evaluating the shape predicate on each pixel
+    for y in range(img.shape[0]):
+        for x in range(img.shape[1]):
+            if fn((x + 0.5) / img.shape[1], (y + 0.5) / img.shape[0]):
+                img[y, x] = color
+    return img
+
+reference_tiles = {}
+
+def render_per_cell(grid, tile_size, agent_pos, agent_dir, highlight_mask):
+    # Reference renderer, drawing each cell with the reference rasterizer
+    img = np.zeros(shape=(grid.height * tile_size, grid.width * tile_size, 3), dtype=np.uint8)
+    for j in range(grid.height):
+        for i in range(grid.width):
+            obj = grid.get(i, j)
+            tile_dir = agent_dir if np.array_equal(agent_pos, (i, j)) else None
+            key = (obj.encode() if obj else None, tile_dir, highlight_mask[i, j], tile_size)
+            if key not in reference_tiles:
+                fill_coords = gym_minigrid.minigrid.fill_coords
+                gym_minigrid.minigrid.fill_coords = fill_coords_per_pixel
+                try:
+                    tile = Grid.draw_tile(obj, tile_dir, highlight_mask[i, j], tile_size)
+                finally:
+                    gym_minigrid.minigrid.fill_coords = fill_coords
+                reference_tiles[key] = tile.astype(np.uint8)
+            img[j*tile_size:(j+1)*tile_size, i*tile_size:(i+1)*tile_size] = reference_tiles[key]
+    return img
+
+for env_name in env_list:
+    env = gym.make(env_name).unwrapped
+    env.reset()
+    for step in range(10):
+        env.step(random.randint(0, env.action_space.n - 1))
+
+        # Views wider than 7 cells do not use the lookup tables
+        env.agent_view_size = (3, 5, 7, 9, 11)[step % 5]
+        off_x, off_y = env.view_offsets(env.agent_view_size, env.agent_dir)
+        view = env.grid.gather(env.agent_pos[0] + off_x, env.agent_pos[1] + off_y)
+        view_pos = (env.agent_view_size // 2, env.agent_view_size - 1)
+        assert np.array_equal(view.copy().process_vis(view_pos), sweep_vis_mask(view, view_pos))
+
+        highlight_mask = np.random.rand(env.width, env.height) < 0.5
+        img = env.grid.render(4, env.agent_pos, env.agent_dir, highlight_mask)
+        assert np.array_equal(img, render_per_cell(env.grid, 4, env.agent_pos, env.agent_dir, highlight_mask))
+
+##############################################################################
+
+print('testing tile cache')
+import os
+import tempfile
+from gym_minigrid.minigrid import TileCache
+
+env = gym.make('MiniGrid-KeyCorridorS3R3-v0')
+env.reset()
+frame = env.render('rgb_array', tile_size=8)
+
+# Prewarmed tiles are the ones rendered on first use
+cache = TileCache(capacity=2)
+cache.prewarm([8], ['wall', 'door', 'key', 'ball', 'box', 'empty'])
+tiles, ready = cache.atlases[8]
+indices = TileCache.index(env.grid.array, np.zeros((env.width, env.height), dtype=np.int64), False)
+assert ready[indices].all()
+assert np.array_equal(tiles[indices], Grid.tile_cache.tiles(8, indices)[indices])
+
+# Saved atlases load back into a new cache, which renders the same frames
+with tempfile.TemporaryDirectory() as tmp_dir:
+    path = os.path.join(tmp_dir, 'tiles.npz')
+    cache.save(path)
+    loaded = TileCache()
+    loaded.load(path)
+assert 8 in loaded
+assert np.array_equal(loaded.atlases[8][1], ready)
+assert np.array_equal(loaded.atlases[8][0][ready], tiles[ready])
+tile_cache = Grid.tile_cache
+Grid.tile_cache = loaded
+try:
+    assert np.array_equal(env.render('rgb_array', tile_size=8), frame)
+finally:
+    Grid.tile_cache = tile_cache
+
+# The least recently used atlas is evicted first
+cache.tiles(4)
+cache.tiles(8)
+cache.tiles(16)
+assert len(cache) == 2 and 8 in cache and 16 in cache and 4 not in cache
+
+##############################################################################
+
+print('testing one-hot observations')
+
+for dtype in ['uint8', 'bool', 'float32']:
+    env = OneHotPartialObsWrapper(gym.make('MiniGrid-KeyCorridorS3R3-v0'), dtype=dtype)
+    obs = env.reset()
+    for _ in range(50):
+        obs, reward, done, info = env.step(random.randint(0, env.action_space.n - 1))
+        img = env.unwrapped.gen_obs()['image']
+        one_hot = obs['image']
+        assert one_hot.dtype == dtype
+        assert env.observation_space.spaces['image'].contains(one_hot)
+        assert np.array_equal(one_hot[:, :, :len(OBJECT_TO_IDX)].argmax(axis=2), img[:, :, 0])
+        assert np.array_equal(one_hot[:, :, len(OBJECT_TO_IDX):-len(STATE_TO_IDX)].argmax(axis=2), img[:, :, 1])
+        assert np.array_equal(one_hot[:, :, -len(STATE_TO_IDX):].argmax(axis=2), img[:, :, 2])
+        assert np.all(one_hot.sum(axis=2) == 3)
+
+##############################################################################
+
+print('testing observation output buffers')
+
+wrappers = [
+    FullyObsWrapper,
+    RGBImgObsWrapper,
+    RGBImgPartialObsWrapper,
+    FlatObsWrapper,
+    OneHotPartialObsWrapper
+]
+# Square and non-square grids
+env_names = ['MiniGrid-KeyCorridorS3R3-v0', 'MiniGrid-KeyCorridorS3R1-v0', 'MiniGrid-ObstructedMaze-1Dl-v0']
+for env_name in env_names:
+    for wrapper in wrappers:
+        env = wrapper(gym.make(env_name))
+        space = env.observation_space
+        if isinstance(space, spaces.Dict):
+            space = space.spaces['image']
+        storage = np.zeros((3,) + space.shape, dtype=space.dtype)
+        out_envs = [
+            wrapper(gym.make(env_name), out=True),
+            wrapper(gym.make(env_name), out=storage[1])
+        ]
+
+        for e in [env] + out_envs:
+            e.seed(1337)
+            e.reset()
+
+        for _ in range(50):
+            action = random.randint(0, env.action_space.n - 1)
+            obs, _, done, _ = env.step(action)
+            if isinstance(obs, dict):
+                obs = obs['image']
+            assert obs.shape == space.shape
+            for out_env in out_envs:
+                out_obs, _, _, _ = out_env.step(action)
+                if isinstance(out_obs, dict):
+                    out_obs = out_obs['image']
+                assert out_obs is out_env.out
+                assert np.array_equal(out_obs, obs)
+            assert np.array_equal(storage[1], obs)
+            assert not storage[0].any() and not storage[2].any()
+            if done:
+                for e in [env] + out_envs:
+                    e.reset()
+
+##############################################################################
+
+print('testing mission encoding')
+
+cache = MissionCache(capacity=2)
+encoding = cache.encode('Go to a box, now', 20).reshape(20, MissionCache.num_char_codes)
+assert encoding.dtype == np.uint8
+assert encoding.argmax(axis=1)[:2].tolist() == [ord('g') - ord('a'), ord('o') - ord('a')]
+assert encoding[2, 26] == 1 and encoding[11].sum() == 0 and encoding[16:].sum() == 0
+try:
+    cache.encode(np.array([1, 2]), 20)
+    assert False
+except TypeError:
+    pass
+cache.encode('a', 20)
+cache.encode('b', 20)
+assert len(cache) == 2 and ('Go to a box, now', 20) not in cache.encodings
+
+env1 = FlatObsWrapper(gym.make('MiniGrid-Fetch-8x8-N3-v0'))
+env2 = FlatObsWrapper(gym.make('MiniGrid-Fetch-8x8-N3-v0'))
+obs = env1.reset()
+assert obs.dtype == np.uint8 and env1.observation_space.contains(obs)
+assert (env1.unwrapped.mission, env1.maxStrLen) in env2.mission_cache.encodings
+
+##############################################################################
+
 print('testing agent_sees method')
 env = gym.make('MiniGrid-DoorKey-6x6-v0')
 goal_pos = (env.grid.width - 2, env.grid.height - 2)
@@ -154,3 +364,505 @@ for i in range(0, 500):
     assert agent_sees_goal == goal_visible
     if done:
         env.reset()
+
+##############################################################################
+
+print('testing vectorized environments')
+from gym_minigrid.vector import VecMiniGrid
+
+num_envs = 4
+vec_env = VecMiniGrid([lambda: gym.make('MiniGrid-DoorKey-6x6-v0')] * num_envs)
+envs = [gym.make('MiniGrid-DoorKey-6x6-v0') for _ in range(num_envs)]
+vec_env.seed(1337)
+for i, env in enumerate(envs):
+    env.seed(1337 + i)
+vec_obs = vec_env.reset()
+obs = [env.reset() for env in envs]
+
+for _ in range(500):
+    for i in range(num_envs):
+        assert np.array_equal(vec_obs['image'][i], obs[i]['image'])
+
+    actions = [random.randint(0, vec_env.action_space.n - 1) for _ in range(num_envs)]
+    vec_obs, vec_reward, vec_done, _ = vec_env.step(actions)
+
+    for i, env in enumerate(envs):
+        obs[i], reward, done, _ = env.step(actions[i])
+        assert done == vec_done[i]
+        assert abs(reward - vec_reward[i]) < 1e-6
+        if done:
+            obs[i] = env.reset()
+
+# Environments with their own step or reward rules are rejected
+for env_name in ['MiniGrid-Fetch-5x5-N2-v0', 'MiniGrid-FourRooms-v0']:
+    try:
+        VecMiniGrid([lambda: gym.make(env_name)])
+        assert False
+    except ValueError:
+        pass
+
+##############################################################################
+
+print('testing subprocess vectorized environments')
+import functools
+from multiprocessing import shared_memory
+from gym_minigrid.vector import SubprocVecMiniGrid
+
+vec_env = SubprocVecMiniGrid([functools.partial(gym.make, 'MiniGrid-DoorKey-6x6-v0')] * num_envs, num_workers=2)
+envs = [gym.make('MiniGrid-DoorKey-6x6-v0') for _ in range(num_envs)]
+assert vec_env.seed(1337) == [[1337 + i] for i in range(num_envs)]
+for i, env in enumerate(envs):
+    env.seed(1337 + i)
+vec_obs = vec_env.reset()
+obs = [env.reset() for env in envs]
+
+for _ in range(200):
+    for i in range(num_envs):
+        assert np.array_equal(vec_obs['image'][i], obs[i]['image'])
+        assert vec_obs['direction'][i] == obs[i]['direction']
+        assert vec_obs['mission'][i] == obs[i]['mission']
+
+    actions = [random.randint(0, vec_env.action_space.n - 1) for _ in range(num_envs)]
+    vec_obs, vec_reward, vec_done, _ = vec_env.step(actions)
+
+    for i, env in enumerate(envs):
+        obs[i], reward, done, _ = env.step(actions[i])
+        assert done == vec_done[i]
+        assert reward == vec_reward[i]
+        if done:
+            obs[i] = env.reset()
+
+# Closing stops the workers and frees the shared memory
+block_names = [block.name for block in vec_env.blocks]
+vec_env.step_async([0] * num_envs)
+vec_env.close()
+vec_env.close()
+assert not any(proc.is_alive() for proc in vec_env.procs)
+for name in block_names:
+    try:
+        shared_memory.SharedMemory(name=name)
+        assert False
+    except FileNotFoundError:
+        pass
+
+# So does garbage collecting the batch, and observations stay readable
+import gc
+vec_env = SubprocVecMiniGrid([functools.partial(gym.make, 'MiniGrid-DoorKey-6x6-v0')] * num_envs, num_workers=2)
+vec_obs = vec_env.reset()
+image = vec_obs['image'].copy()
+block_names = [block.name for block in vec_env.blocks]
+procs = vec_env.procs
+del vec_env
+gc.collect()
+assert not any(proc.is_alive() for proc in procs)
+assert np.array_equal(vec_obs['image'], image)
+for name in block_names:
+    try:
+        shared_memory.SharedMemory(name=name)
+        assert False
+    except FileNotFoundError:
+        pass
+
+# Shared memory is freed when the setup fails
+if os.path.isdir('/dev/shm'):
+    shm_files = set(os.listdir('/dev/shm'))
+    try:
+        SubprocVecMiniGrid([functools.partial(gym.make, 'MiniGrid-DoorKey-6x6-v0')] * num_envs, context='unknown')
+        assert False
+    except ValueError:
+        pass
+    assert set(os.listdir('/dev/shm')) == shm_files
+
+##############################################################################
+
+print('testing state snapshots')
+import pickle
+
+for env_name in ['MiniGrid-KeyCorridorS3R3-v0', 'MiniGrid-Dynamic-Obstacles-6x6-v0']:
+    env = gym.make(env_name)
+    env.reset()
+    for _ in range(100):
+        state = env.get_state()
+        state_key = env.unwrapped.state_key
+        actions = [random.randint(0, env.action_space.n - 1) for _ in range(10)]
+
+        # Restore the snapshot in place and after a pickling round trip
+        results = []
+        for restore in range(3):
+            if restore:
+                env.set_state(state if restore == 1 else pickle.loads(pickle.dumps(state)))
+                assert env.unwrapped.state_key == state_key
+            obs_list = []
+            for action in actions:
+                obs, reward, done, info = env.step(action)
+                obs_list.append((obs['image'].tobytes(), reward, str(env)))
+                if done:
+                    break
+            results.append(obs_list)
+
+        assert results[0] == results[1] == results[2]
+        if done:
+            env.reset()
+
+# Attributes referencing objects are bound to the objects of the restored grid
+env = gym.make('MiniGrid-KeyCorridorS3R3-v0').unwrapped
+env.reset()
+env.set_state(pickle.loads(pickle.dumps(env.get_state())))
+assert env.grid.get(*env.obj.cur_pos) is env.obj
+env.agent_pos = env.obj.cur_pos - DIR_TO_VEC[env.agent_dir]
+_, reward, done, _ = env.step(env.actions.pickup)
+assert done and reward > 0
+
+env = gym.make('MiniGrid-Dynamic-Obstacles-6x6-v0').unwrapped
+env.reset()
+env.set_state(pickle.loads(pickle.dumps(env.get_state())))
+for _ in range(10):
+    assert all(env.grid.get(*obstacle.cur_pos) is obstacle for obstacle in env.obstacles)
+    _, _, done, _ = env.step(env.actions.left)
+    if done:
+        break
+
+##############################################################################
+
+print('testing state hashing')
+from gym_minigrid.minigrid import Door
+
+env = gym.make('MiniGrid-Empty-8x8-v0').unwrapped
+env.reset()
+env.agent_pos = (3, 3)
+env.agent_dir = 0
+
+def state_hashes():
+    return env.hash(), env.hash(fast=True), env.hash(size=64)
+
+hashes = [state_hashes()]
+env.put_obj(Door('yellow'), *env.front_pos)
+hashes.append(state_hashes())
+env.step(env.actions.toggle)
+hashes.append(state_hashes())
+env.step(env.actions.right)
+hashes.append(state_hashes())
+env.put_obj(Ball('red'), *env.front_pos)
+hashes.append(state_hashes())
+env.step(env.actions.pickup)
+hashes.append(state_hashes())
+env.step(env.actions.left)
+hashes.append(state_hashes())
+
+# Distinct states hash differently, and the same state hashes the same
+for k in range(3):
+    assert len(set(h[k] for h in hashes)) == len(hashes)
+env.step(env.actions.right)
+env.step(env.actions.drop)
+assert state_hashes() == hashes[4]
+assert len(hashes[0][0]) == len(hashes[0][1]) == 16 and len(hashes[0][2]) == 64
+
+##############################################################################
+
+print('testing level banks')
+from gym_minigrid.levelbank import LevelBank, LevelBankWrapper
+
+for env_name in ['MiniGrid-KeyCorridorS3R3-v0', 'MiniGrid-ObstructedMaze-1Dlh-v0']:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bank = LevelBank.generate(env_name, tmp_dir, num_levels=5, seed=100)
+        assert len(bank) == 5 and bank.env_id == env_name
+
+        # Loaded levels are the levels generated with the same seeds
+        env = gym.make(env_name).unwrapped
+        bank_env = gym.make(env_name).unwrapped
+        for index in range(len(bank)):
+            env.seed(100 + index)
+            env.reset()
+            bank_env.reset()
+            bank.load(bank_env, index)
+            assert bank_env.grid == env.grid
+            assert tuple(bank_env.agent_pos) == tuple(env.agent_pos)
+            assert bank_env.agent_dir == env.agent_dir
+            assert bank_env.mission == env.mission
+            assert bank_env.grid.get(*bank_env.obj.cur_pos) is bank_env.obj
+
+            # The rooms share their doors and objects with the grid
+            for row in bank_env.room_grid:
+                for room in row:
+                    for door, pos in zip(room.doors, room.door_pos):
+                        if isinstance(door, Door):
+                            assert bank_env.grid.get(*pos) is door
+                    for obj in room.objs:
+                        if obj.cur_pos is not None:
+                            assert bank_env.grid.get(*obj.cur_pos) is obj
+
+        # Resetting through the wrapper loads levels of the bank
+        env = LevelBankWrapper(gym.make(env_name), LevelBank(tmp_dir))
+        for _ in range(10):
+            env.reset()
+            assert any(np.array_equal(env.grid.array, grid) for grid in bank.grids)
+            for _ in range(10):
+                env.step(random.randint(0, env.action_space.n - 1))
+        del bank, env
+
+##############################################################################
+
+print('testing level prefetching')
+from gym_minigrid.prefetch import PrefetchWrapper
+
+for env_name in ['MiniGrid-MultiRoom-N6-v0', 'MiniGrid-KeyCorridorS3R3-v0']:
+    for fast_rng in [False, True]:
+        env = gym.make(env_name)
+        prefetch_env = gym.make(env_name)
+        for e in [env, prefetch_env]:
+            e.unwrapped.fast_rng = fast_rng
+            e.seed(1337)
+        prefetch_env = PrefetchWrapper(prefetch_env, queue_size=2)
+
+        # The prefetched levels are the ones the environment generates,
+        # including after reseeding through the wrapper
+        for seed in [None, 5]:
+            if seed is not None:
+                env.seed(seed)
+                prefetch_env.seed(seed)
+            for _ in range(5):
+                env.reset()
+                prefetch_env.reset()
+                assert prefetch_env.grid == env.grid
+                assert tuple(prefetch_env.agent_pos) == tuple(env.agent_pos)
+                assert prefetch_env.agent_dir == env.agent_dir
+                assert prefetch_env.mission == env.mission
+
+        prefetch_env.close()
+        assert prefetch_env.prefetcher.thread is None
+
+# Fields mutated in place by the level generation are prefetched too
+from gym_minigrid.envs import EmptyEnv
+
+class CountingEnv(EmptyEnv):
+    def __init__(self):
+        self.level_counts = {'levels': 0}
+        super().__init__(size=5)
+
+    def _gen_grid(self, width, height):
+        super()._gen_grid(width, height)
+        self.level_counts['levels'] += 1
+
+env = CountingEnv()
+env.seed(1337)
+prefetch_env = PrefetchWrapper(env, queue_size=2)
+for _ in range(5):
+    count = env.level_counts['levels']
+    prefetch_env.reset()
+    assert env.level_counts == {'levels': count + 1}
+prefetch_env.close()
+
+##############################################################################
+
+print('testing object placement')
+
+env = gym.make('MiniGrid-Empty-8x8-v0')
+env.reset()
+for rejection_sampling in [False, True]:
+    env.unwrapped.rejection_sampling = rejection_sampling
+    env.unwrapped.grid = Grid(5, 5)
+    env.unwrapped.grid.wall_rect(0, 0, 5, 5)
+    env.unwrapped.agent_pos = (1, 1)
+    positions = set()
+    for _ in range(8):
+        pos = env.unwrapped.place_obj(Ball())
+        assert tuple(pos) != (1, 1)
+        positions.add(tuple(pos))
+    assert len(positions) == 8
+    try:
+        env.unwrapped.place_obj(Ball(), max_tries=100)
+        assert False
+    except RecursionError:
+        pass
+
+# By default, seeds generate the same levels as earlier versions
+import hashlib
+
+level_digests = {
+    'MiniGrid-DoorKey-8x8-v0': 'f59020cbdbddcedd',
+    'MiniGrid-MultiRoom-N6-v0': '1553fdae540862ad',
+    'MiniGrid-Fetch-8x8-N3-v0': '5b0b6ba9a5c45db4',
+    'MiniGrid-KeyCorridorS3R3-v0': '2d956e947b884336',
+    'MiniGrid-LockedRoom-v0': '65518e5e44c1ea5e',
+    'MiniGrid-ObstructedMaze-Full-v0': 'ede19155e8cf4c44',
+}
+for env_name, level_digest in level_digests.items():
+    env = gym.make(env_name)
+    digest = hashlib.sha256()
+    for seed in range(5):
+        env.seed(seed)
+        env.reset()
+        digest.update(env.grid.encode().tobytes())
+        digest.update(np.array([*env.agent_pos, env.agent_dir], dtype=np.int64).tobytes())
+    assert digest.hexdigest()[:16] == level_digest, env_name
+
+##############################################################################
+
+print('testing fast RNG mode')
+from gym_minigrid.rng import BatchedRandom
+
+for env_name in ['MiniGrid-MultiRoom-N6-v0', 'MiniGrid-KeyCorridorS3R3-v0', 'MiniGrid-Fetch-8x8-N3-v0']:
+    env = gym.make(env_name)
+    env.unwrapped.fast_rng = True
+    for seed in range(5):
+        env.seed(seed)
+        assert isinstance(env.unwrapped.np_random, BatchedRandom)
+        env.reset()
+        grid1 = env.grid.encode()
+        state = env.get_state()
+        env.reset()
+        grid2 = env.grid.encode()
+        env.set_state(state)
+        env.reset()
+        assert np.array_equal(env.grid.encode(), grid2)
+        env.seed(seed)
+        env.reset()
+        assert np.array_equal(env.grid.encode(), grid1)
+
+    assert sorted(env.unwrapped._rand_subset(range(10), 10)) == list(range(10))
+
+##############################################################################
+
+print('testing lazy imports')
+
+import sys
+import subprocess
+
+# Making an environment only imports its own module, and not the SSP dependencies
+modules = subprocess.check_output([
+    sys.executable,
+    '-c',
+    "import sys, gym, gym_minigrid; gym.make('MiniGrid-DoorKey-8x8-v0'); print(' '.join(sys.modules))"
+], stderr=subprocess.DEVNULL).decode().split()
+env_modules = [m for m in modules if m.startswith('gym_minigrid.envs.')]
+assert env_modules == ['gym_minigrid.envs.doorkey'], env_modules
+assert 'nengo_spa' not in modules and 'nengo_ssp' not in modules
+
+# Looking up names which are not environment classes imports no module
+modules = subprocess.check_output([
+    sys.executable,
+    '-c',
+    "import sys, gym_minigrid.envs as envs; assert not hasattr(envs, 'foo'); print(' '.join(sys.modules))"
+], stderr=subprocess.DEVNULL).decode().split()
+assert not [m for m in modules if m.startswith('gym_minigrid.envs.')]
+
+# Star imports export all the environment classes
+namespace = {}
+exec('from gym_minigrid.envs import *', namespace)
+assert namespace['DoorKeyEnv'] is DoorKeyEnv and 'CrossingEnv' in namespace
+import gym_minigrid.envs
+assert 'KeyCorridorS3R3' in dir(gym_minigrid.envs)
+
+# The grid, objects, constants and base classes are still exported, as are
+# the environment modules
+from gym_minigrid.minigrid import MiniGridEnv, COLOR_NAMES
+from gym_minigrid.roomgrid import RoomGrid
+for name, value in [('Grid', Grid), ('MiniGridEnv', MiniGridEnv), ('RoomGrid', RoomGrid), ('COLOR_NAMES', COLOR_NAMES)]:
+    assert namespace[name] is value and getattr(gym_minigrid.envs, name) is value
+assert gym_minigrid.envs.doorkey.DoorKeyEnv is DoorKeyEnv
+
+# Star imports of the wrappers do not overwrite the caller's SSP modules
+namespace = {'spa': 'nengo_spa', 'ssp': 'nengo_ssp'}
+exec('from gym_minigrid.wrappers import *', namespace)
+assert namespace['spa'] == 'nengo_spa' and namespace['ssp'] == 'nengo_ssp'
+
+##############################################################################
+
+print('testing mission tokens')
+
+for env_name in ['MiniGrid-Fetch-8x8-N3-v0', 'MiniGrid-LockedRoom-v0', 'MiniGrid-KeyCorridorS3R3-v0']:
+    env = gym.make(env_name)
+    env.unwrapped.enable_mission_tokens()
+    for _ in range(10):
+        obs = env.reset()
+        tokens = obs['mission_tokens']
+        assert tokens.dtype == np.uint16
+        assert env.observation_space.spaces['mission_tokens'].contains(tokens)
+        words = [MISSION_VOCAB[t] for t in tokens if t != 0]
+        assert words == env.unwrapped.mission.replace(',', '').split(' ')
+        obs, _, _, _ = env.step(0)
+        assert obs['mission_tokens'] is tokens
+
+# Missions which are not strings can not be tokenized
+env = gym.make('MiniGrid-EmptyGoal-8x8-v0')
+for fn in [env.unwrapped.enable_mission_tokens, lambda: tokenize_mission(env.unwrapped.mission)]:
+    try:
+        fn()
+        assert False
+    except TypeError:
+        pass
+assert 'mission_tokens' not in env.reset()
+
+def make_env(env_name):
+    env = gym.make(env_name)
+    env.unwrapped.enable_mission_tokens(16)
+    return env
+
+vec_env = VecMiniGrid([
+    functools.partial(make_env, env_name)
+    for env_name in ['MiniGrid-DoorKey-5x5-v0', 'MiniGrid-Empty-5x5-v0'] * 2
+])
+vec_obs = vec_env.reset()
+assert vec_obs['mission_tokens'].shape == (4, 16)
+for i, mission in enumerate(vec_obs['mission']):
+    assert np.array_equal(vec_obs['mission_tokens'][i], tokenize_mission(mission, 16))
+
+##############################################################################
+
+print('testing SSP observations')
+
+env = SSPWrapper(gym.make('MiniGrid-KeyCorridorS3R3-v0'), 64, rng=np.random.RandomState(0))
+obs = env.reset()
+assert obs['image'].shape == (64,)
+images = []
+for _ in range(20):
+    obs, _, _, _ = env.step(random.randint(0, env.action_space.n - 1))
+    images.append(env.unwrapped.gen_obs()['image'])
+    assert np.allclose(obs['image'], env.encode(images[-1]))
+assert np.allclose(env.encode(np.stack(images)), [env.encode(image) for image in images])
+
+# A single object type in view encodes as its normalized cell SSPs bound to its pointer
+image = np.zeros_like(images[0])
+image[:, :, 0] = OBJECT_TO_IDX['empty']
+image[1, 2, 0] = image[3, 4, 0] = OBJECT_TO_IDX['key']
+S = env.S_list_rec[1, 2] + env.S_list_rec[3, 4]
+S = S / np.linalg.norm(S)
+key = env.vocab['KEY'].v
+bound = np.fft.irfft(np.fft.rfft(S) * np.fft.rfft(key), n=64)
+assert np.allclose(env.encode(image), bound)
+
+env = SSPWrapper2(gym.make('MiniGrid-Empty-8x8-v0'), 64, rng=np.random.RandomState(0))
+goal_env = SSPGoalWrapper(gym.make('MiniGrid-Empty-8x8-v0'), 64, env.X, env.Y, rng=np.random.RandomState(0))
+assert goal_env.positions is position_ssps(env.X, env.Y, 8, 8)
+env.reset()
+goal_env.reset()
+for _ in range(20):
+    action = random.randint(0, env.action_space.n - 1)
+    obs, _, _, _ = env.step(action)
+    x, y = env.unwrapped.agent_pos
+    dx, dy = DIR_TO_VEC[env.unwrapped.agent_dir]
+    M = env.vocab['POSITION'] * (env.X**x * env.Y**y) + env.vocab['DIRECTION'] * (env.X**dx * env.Y**dy)
+    assert np.allclose(obs['image'], M.v)
+
+    obs, _, _, _ = goal_env.step(action)
+    x, y = goal_env.unwrapped.agent_pos
+    gx, gy = goal_env.goal_position
+    similarity = np.sum((env.X**x * env.Y**y).v.real * (env.X**gx * env.Y**gy).v.real)
+    assert np.isclose(obs['goal_similarity'], similarity)
+
+# SSP spaces sample, check and decode batches of position SSPs
+space = SSPSpace([env.X, env.Y], radius=3)
+space.seed(0)
+samples = space.samples(10)
+assert samples.shape == (10, 64) and samples.flags['C_CONTIGUOUS']
+assert samples.dtype == space.dtype and space.sample().dtype == space.dtype
+assert space.sample().shape == (64,) and space.contains(space.sample())
+assert space.contains(samples).all() and space.contains(samples[0])
+assert space.contains(env.X) and not space.contains(np.zeros(3))
+space.seed(0)
+assert np.array_equal(space.samples(10), samples)
+assert np.allclose(space.encode([[2, 5]]), (env.X**2 * env.Y**5).v.real)
+table = position_ssps(env.X, env.Y, 8, 8)
+assert space.decode(table[2, 5], 8, 8) == (2, 5)
+cells = np.stack(np.meshgrid(range(8), range(8), indexing='ij'), axis=-1)
+assert np.array_equal(space.decode(table, 8, 8), cells)